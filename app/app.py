@@ -1,12 +1,16 @@
 import streamlit as st
 from streamlit_chat import message
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import json
 from url_handler import is_url, extract_url, get_job
 
 # App Configuration
 API_ENDPOINT = "https://shl-recommendation-system-fpr1.onrender.com/recommend"
 PROJECT_LINK = "https://github.com/jazz023/SHL-Recommendation-System"
+# (connect, read) seconds; the free instance can take a minute to wake up
+API_TIMEOUT = (10, 120)
 
 # Dark Theme with SHL Logo Complementary Colors
 st.markdown("""
@@ -77,10 +81,46 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_name_mapping():
-    df = pd.read_csv("app/data/shl_product_details.csv")
-    return pd.Series(df.Name.values, index=df.URL.str.strip()).to_dict()
+@st.cache_resource
+def get_session():
+    # One pooled keep-alive session for the whole app, shared across reruns
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=8))
+    return session
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def fetch_recommendations(key: str, _query: str) -> list:
+    # Memoized on the whitespace-normalized `key` only (cache_data skips _-prefixed
+    # arguments); the API gets the original text, whose line breaks it chunks on.
+    # Failures raise and are not cached, so a retry hits the API again
+    response = get_session().post(API_ENDPOINT, json={"query": _query}, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()['recommended_assessments']
+
+def build_results(recommendations: list) -> dict:
+    # Built once per message; reruns reuse the stored table and download payload
+    df = pd.DataFrame([{
+        "name": item.get('name') or "Unknown Assessment",
+        "duration": str(item.get('duration')) or "N/A",
+        "test_type": ", ".join(
+            item.get('test_type', []) if isinstance(item.get('test_type', []), list)
+            else item.get('test_type', '').split(', ')
+        ),
+        "remote_support": item.get('remote_support', 'No'),
+        "adaptive_support": item.get('adaptive_support', 'No'),
+        "url": item.get('url', '')
+    } for item in recommendations if isinstance(item, dict)])
+    
+    # Display table with 1-based index
+    df.index = df.index + 1  # Start from 1 instead of 0
+    
+    return {
+        "table": df.style
+            .set_properties(**{'color': '#E0E0E0', 'background-color': '#2D2D2D'})
+            .map(lambda x: 'color: #7CCD32; font-weight: 500' if str(x) == 'Yes' else '', 
+                    subset=['remote_support','adaptive_support']),
+        "download": pd.DataFrame(recommendations).to_json(indent=2)
+    }
 
 def main():
     st.markdown("""
@@ -104,8 +144,6 @@ def main():
         </style>
         """, unsafe_allow_html=True)
     
-    url_to_name = load_name_mapping()
-    
     # Header with light box for logo
     col1, col2 = st.columns([1,6])
     with col1:
@@ -178,27 +216,26 @@ def main():
             
         
         try:
-            # API Call
+            # API Call (memoized per query)
             with st.spinner("🔍 Finding best assessments..."):
-                response = requests.post(
-                    API_ENDPOINT,
-                    json={"query": user_input}
-                )
+                recommendations = fetch_recommendations(" ".join(user_input.split()), _query=user_input)
             
-            if response.status_code == 200:
-                recommendations = response.json()['recommended_assessments']
-                
-                # Add bot response
-                st.session_state.conversation.append({
-                    'role': 'assistant',
-                    'content': recommendations,
-                    'avatar_style': "bottts"
-                })
-            else:
-                st.warning("⚠️ API request failed. Please try again.")
+            # Add bot response
+            bot_message = {
+                'role': 'assistant',
+                'content': recommendations,
+                'avatar_style': "bottts"
+            }
+            try:
+                bot_message['results'] = build_results(recommendations)
+            except Exception as e:
+                bot_message['error'] = str(e)
+            st.session_state.conversation.append(bot_message)
                 
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             st.error("🔌 Connection Error: Please ensure the API server is running")
+        except requests.exceptions.RequestException:
+            st.warning("⚠️ API request failed. Please try again.")
 
     # Display Conversation
     for idx, msg in enumerate(st.session_state.conversation):
@@ -213,32 +250,14 @@ def main():
                        key=f"bot_{idx}", 
                        avatar_style="bottts")
                 
-                # Create styled dataframe
+                # Styled table built when the message was added
+                results = msg.get('results')
                 try:
-                    
-                    data = msg['content']
-                        
-                    # Create DataFrame with proper column handling
-                    df = pd.DataFrame([{
-                        "name": url_to_name.get(item.get('url', ''), "Unknown Assessment"),
-                        "duration": str(item.get('duration')) or "N/A",
-                        "test_type": ", ".join(
-                            item.get('test_type', []) if isinstance(item.get('test_type', []), list)
-                            else item.get('test_type', '').split(', ')
-                        ),
-                        "remote_support": item.get('remote_support', 'No'),
-                        "adaptive_support": item.get('adaptive_support', 'No'),
-                        "url": item.get('url', '')
-                    } for item in data if isinstance(item, dict)])
-                    
-                    # Display table with 1-based index
-                    df.index = df.index + 1  # Start from 1 instead of 0
+                    if results is None:
+                        raise ValueError(msg.get('error', "No results"))
                     
                     st.dataframe(
-                        df.style
-                        .set_properties(**{'color': '#E0E0E0', 'background-color': '#2D2D2D'})
-                        .map(lambda x: 'color: #7CCD32; font-weight: 500' if str(x) == 'Yes' else '', 
-                                subset=['remote_support','adaptive_support']),
+                        results['table'],
                         use_container_width=True,   
                         height=400,
                         column_config={
@@ -256,7 +275,7 @@ def main():
                 # Download button
                 st.download_button(
                     label="📥 Download Recommendations",
-                    data=pd.DataFrame(msg['content']).to_json(indent=2),
+                    data=results['download'] if results else json.dumps(msg['content'], indent=2),
                     file_name="shl_recommendations.json",
                     mime="application/json",
                     help="Download all recommendations in JSON format",
@@ -0,0 +1,72 @@
+import re
+
+# Mapping dictionary from the catalog legend
+TEST_TYPE_MAPPING = {
+    'A': 'Ability & Aptitude',
+    'B': 'Biodata & Situational Judgement',
+    'C': 'Competencies',
+    'D': 'Development & 360',
+    'E': 'Assessment Exercises',
+    'K': 'Knowledge & Skills',
+    'P': 'Personality & Behavior',
+    'S': 'Simulations'
+}
+
+_TEST_TYPES_BY_NAME = {name.lower(): name for name in TEST_TYPE_MAPPING.values()}
+TEST_TYPE_CODES = {name: code for code, name in TEST_TYPE_MAPPING.items()}
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def parse_duration(duration) -> int | None:
+    try:
+        # Direct integer conversion
+        return int(duration)
+    except (TypeError, ValueError):
+        # Extract first numeric sequence from strings
+        if match := re.search(r'\d+', str(duration)):
+            return int(match.group())
+    return None
+
+
+def expand_test_type(code_str) -> str:
+    """Convert legend letters (e.g. "KP") to comma-separated test type names"""
+    if code_str is None or code_str != code_str:  # None or NaN
+        return ''
+    return ', '.join(TEST_TYPE_MAPPING[char] for char in str(code_str) if char in TEST_TYPE_MAPPING)
+
+
+def split_test_types(value) -> list:
+    """Test types as a list, from either a keyword list or a comma-separated string"""
+    if isinstance(value, list):
+        return [t.strip() for t in value if t and t.strip()]
+    return [t.strip() for t in str(value or "").split(",") if t.strip()]
+
+
+def summarize_description(text: str, max_tokens: int = 40) -> str:
+    """Leading sentences of a description that fit in roughly `max_tokens` tokens"""
+    max_words = max(1, int(max_tokens * 0.75))  # ~0.75 words per token for English
+    summary = []
+    for sentence in _SENTENCE_END.split(str(text or "").strip()):
+        words = sentence.split()
+        if len(summary) + len(words) > max_words:
+            if not summary:
+                summary = words[:max_words] + ["..."]
+            break
+        summary += words
+    return " ".join(summary)
+
+
+def normalize_test_types(value) -> list:
+    """Canonical test type names from user input (names or legend letters, any case).
+
+    Raises ValueError for anything that is not a known test type.
+    """
+    normalized = []
+    for item in split_test_types(value):
+        name = TEST_TYPE_MAPPING.get(item.upper()) if len(item) == 1 else _TEST_TYPES_BY_NAME.get(item.lower())
+        if name is None:
+            raise ValueError(f"Unknown test type: {item}")
+        if name not in normalized:
+            normalized.append(name)
+    return normalized
@@ -0,0 +1,101 @@
+import math
+from functools import lru_cache
+
+# Qdrant settings for the rag_embeddings collection, selected with QDRANT_COLLECTION_PROFILE.
+# quantization: None, "int8" (scalar) or "binary"; quantized vectors stay in RAM and the
+# originals can live on disk, with top candidates rescored against them at search time.
+COLLECTION_PROFILES = {
+    "default": {
+        "quantization": None, "vectors_on_disk": False, "on_disk_payload": False,
+        "m": 16, "ef_construct": 100, "hnsw_ef": None, "oversampling": None
+    },
+    "int8": {
+        "quantization": "int8", "vectors_on_disk": True, "on_disk_payload": True,
+        "m": 16, "ef_construct": 100, "hnsw_ef": 128, "oversampling": 2.0
+    },
+    "binary": {
+        "quantization": "binary", "vectors_on_disk": True, "on_disk_payload": True,
+        "m": 16, "ef_construct": 100, "hnsw_ef": 128, "oversampling": 3.0
+    },
+    "int8_compact": {
+        "quantization": "int8", "vectors_on_disk": True, "on_disk_payload": True,
+        "m": 8, "ef_construct": 64, "hnsw_ef": 64, "oversampling": 2.0
+    },
+    "high_recall": {
+        "quantization": None, "vectors_on_disk": False, "on_disk_payload": False,
+        "m": 32, "ef_construct": 200, "hnsw_ef": 256, "oversampling": None
+    }
+}
+
+
+def get_profile(name: str) -> dict:
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile: {name} (expected one of {', '.join(COLLECTION_PROFILES)})")
+    return COLLECTION_PROFILES[name]
+
+
+def _quantization_config(profile: dict):
+    from qdrant_client import models
+
+    if profile["quantization"] == "int8":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+        ))
+    if profile["quantization"] == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def collection_config(name: str, dim: int) -> dict:
+    """Keyword arguments for QdrantClient.create_collection"""
+    from qdrant_client import models
+
+    profile = get_profile(name)
+    return {
+        "vectors_config": models.VectorParams(
+            size=dim, distance=models.Distance.COSINE, on_disk=profile["vectors_on_disk"]
+        ),
+        "hnsw_config": models.HnswConfigDiff(m=profile["m"], ef_construct=profile["ef_construct"]),
+        "quantization_config": _quantization_config(profile),
+        "on_disk_payload": profile["on_disk_payload"]
+    }
+
+
+def collection_update(name: str) -> dict:
+    """Keyword arguments for QdrantClient.update_collection, to move an existing collection to a profile"""
+    from qdrant_client import models
+
+    profile = get_profile(name)
+    return {
+        "vectors_config": {"": models.VectorParamsDiff(on_disk=profile["vectors_on_disk"])},
+        "hnsw_config": models.HnswConfigDiff(m=profile["m"], ef_construct=profile["ef_construct"]),
+        "quantization_config": _quantization_config(profile) or models.Disabled.DISABLED,
+        "collection_params": models.CollectionParamsDiff(on_disk_payload=profile["on_disk_payload"])
+    }
+
+
+@lru_cache(maxsize=None)
+def search_params(name: str):
+    """models.SearchParams for queries against a collection built with this profile"""
+    from qdrant_client import models
+
+    profile = get_profile(name)
+    quantization = models.QuantizationSearchParams(
+        rescore=True, oversampling=profile["oversampling"]
+    ) if profile["quantization"] else None
+    return models.SearchParams(hnsw_ef=profile["hnsw_ef"], quantization=quantization)
+
+
+def estimate_ram_bytes(name: str, points: int, dim: int, payload_bytes: int = 0) -> dict:
+    """Rough resident memory per component, for sizing rather than accounting"""
+    profile = get_profile(name)
+    quantized = {"int8": dim, "binary": math.ceil(dim / 8)}.get(profile["quantization"], 0)
+    estimate = {
+        "vectors": 0 if profile["vectors_on_disk"] else points * dim * 4,
+        "quantized_vectors": points * quantized,
+        # Level 0 keeps up to 2*m links per point; upper levels add roughly 1/m more
+        "hnsw_graph": int(points * 2 * profile["m"] * 4 * (1 + 1 / profile["m"])),
+        "payload": 0 if profile["on_disk_payload"] else payload_bytes
+    }
+    estimate["total"] = sum(estimate.values())
+    return estimate
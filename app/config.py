@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,4 +7,103 @@ load_dotenv()
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_URL = os.getenv("QDRANT_URL")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Retrieval backend: "qdrant" (remote cluster) or "numpy" (in-process index)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "qdrant").lower()
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "app/data/vector_index")
+
+# Query embedding cache (set EMBEDDING_CACHE_PATH to persist across restarts)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH") or None
+
+# Max in-flight provider calls per API worker
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "16"))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "16"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+
+# LLM rerank result cache
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "1024"))
+RERANK_CACHE_TTL = float(os.getenv("RERANK_CACHE_TTL", str(24 * 3600)))
+
+# End-to-end latency budget for /recommend; rerank falls back to vector order past it
+LATENCY_BUDGET_MS = int(os.getenv("LATENCY_BUDGET_MS", "10000"))
+# Hedge the LLM call with a second request after this percentile of recent latency
+RERANK_HEDGE = os.getenv("RERANK_HEDGE", "false").lower() == "true"
+RERANK_HEDGE_PERCENTILE = float(os.getenv("RERANK_HEDGE_PERCENTILE", "95"))
+RERANK_HEDGE_MIN_SAMPLES = int(os.getenv("RERANK_HEDGE_MIN_SAMPLES", "20"))
+
+# Rerank mode: "llm" (Groq) or "local" (feature-based, CPU only)
+RERANK_MODE = os.getenv("RERANK_MODE", "llm").lower()
+# What to return when the LLM rerank fails or times out: "vector" order or "local" rerank
+RERANK_FALLBACK = os.getenv("RERANK_FALLBACK", "vector").lower()
+# JSON object overriding local_rerank.DEFAULT_WEIGHTS, e.g. '{"lexical": 1.0}'
+LOCAL_RERANK_WEIGHTS = json.loads(os.getenv("LOCAL_RERANK_WEIGHTS", "{}"))
+
+# Approximate token budget per candidate description in the rerank prompt
+RERANK_DESCRIPTION_TOKENS = int(os.getenv("RERANK_DESCRIPTION_TOKENS", "40"))
+
+# Max queries accepted by /recommend/batch
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "100"))
+
+# Allow per-request sampling profiles via /recommend?profile=true
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+# Responses at least this large (bytes) are gzip/brotli compressed
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1000"))
+# Cache-Control max-age (seconds) for GET /recommend responses
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "300"))
+
+# Warm up provider clients, the index and one embed in the background at startup
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# /ready re-runs its dependency checks at most this often (seconds), each with this timeout
+READY_CHECK_TTL = float(os.getenv("READY_CHECK_TTL", "30"))
+READY_CHECK_TIMEOUT = float(os.getenv("READY_CHECK_TIMEOUT", "10"))
+
+# Catalog crawler (app/prepocessing): worker threads, requests/second per host,
+# per-request timeout, retries, and the on-disk conditional-GET cache
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+CRAWL_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "4"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "20"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "3"))
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "app/prepocessing/data/http_cache")
+
+# Raw HTML snapshots of product pages, and processes used to parse them (0 = one per CPU)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "app/prepocessing/data/snapshots")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))
+
+# Job description fetching (url_handler): timeouts in seconds, max page size, extracted text cache
+JD_CONNECT_TIMEOUT = float(os.getenv("JD_CONNECT_TIMEOUT", "5"))
+JD_READ_TIMEOUT = float(os.getenv("JD_READ_TIMEOUT", "10"))
+JD_FETCH_DEADLINE = float(os.getenv("JD_FETCH_DEADLINE", "20"))
+JD_MAX_BYTES = int(os.getenv("JD_MAX_BYTES", str(5 * 1024 * 1024)))
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "256"))
+JD_CACHE_TTL = float(os.getenv("JD_CACHE_TTL", "3600"))
+
+# Share one pipeline run between identical concurrent /recommend requests
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+# rag_embeddings quantization/HNSW/on-disk profile, see collection_profiles.COLLECTION_PROFILES
+QDRANT_COLLECTION_PROFILE = os.getenv("QDRANT_COLLECTION_PROFILE", "default")
+
+# Semantic result cache: reuse a final ranking for queries whose embedding has at least
+# this cosine similarity to a cached one with the same filters (size 0 disables)
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+# Long queries (e.g. a pasted job description) are embedded and searched as chunks of at most
+# QUERY_CHUNK_WORDS words (first QUERY_MAX_CHUNKS kept), and the reranker sees an extractive
+# summary of at most RERANK_QUERY_WORDS words
+QUERY_CHUNK_WORDS = int(os.getenv("QUERY_CHUNK_WORDS", "120"))
+QUERY_MAX_CHUNKS = int(os.getenv("QUERY_MAX_CHUNKS", "8"))
+RERANK_QUERY_WORDS = int(os.getenv("RERANK_QUERY_WORDS", "80"))
+
+# Adaptive LLM rerank: candidates scoring below RERANK_SCORE_CUTOFF x the best similarity are left
+# out of the prompt (keeping at least RERANK_MIN_CANDIDATES), and the LLM is skipped when each of
+# the top RERANK_SKIP_DEPTH results leads the next by RERANK_SKIP_MARGIN cosine (depth 0 disables)
+RERANK_SCORE_CUTOFF = float(os.getenv("RERANK_SCORE_CUTOFF", "0.85"))
+RERANK_MIN_CANDIDATES = int(os.getenv("RERANK_MIN_CANDIDATES", "10"))
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", "0.03"))
+RERANK_SKIP_DEPTH = int(os.getenv("RERANK_SKIP_DEPTH", "3"))
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from cache import TTLCache
+
+SQLITE_BATCH = 500  # Keys per SELECT, under SQLite's bound-parameter limit
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def cache_key(text: str, model: str, task_type: str) -> str:
+    raw = f"{model}\x00{task_type}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU + TTL cache of embedding vectors, optionally backed by SQLite.
+
+    The in-memory tier holds at most `max_size` vectors. When `path` is set,
+    every vector is also written to a SQLite file so the cache survives
+    restarts; disk hits are promoted back into memory. The *_async methods
+    run disk I/O in a worker thread, and rows older than `ttl` are deleted
+    at most every `purge_interval` seconds.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 7 * 24 * 3600, path: str | None = None,
+                 purge_interval: float = 3600):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._memory = TTLCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._next_purge = 0.0  # Purge on the first write
+        self.disk_hits = 0
+        self.misses = 0
+        self.purged = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _read(self, keys: list) -> dict:
+        # key -> (vector, created_at) for the live rows among `keys`
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_BATCH):
+                chunk = keys[start:start + SQLITE_BATCH]
+                rows += self._db.execute(
+                    f"SELECT key, vector, created_at FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+        now = time.time()
+        return {
+            key: (np.frombuffer(blob, dtype=np.float32).tolist(), created_at)
+            for key, blob, created_at in rows
+            if self.ttl is None or now - created_at <= self.ttl
+        }
+
+    def _write(self, rows: list):
+        # One transaction per batch, with the occasional sweep of expired rows
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            if self.ttl is not None and time.monotonic() >= self._next_purge:
+                cursor = self._db.execute(
+                    "DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl,)
+                )
+                self.purged += cursor.rowcount
+                self._next_purge = time.monotonic() + self.purge_interval
+            self._db.commit()
+
+    def _memory_lookup(self, keys: list) -> tuple[list, list]:
+        vectors = [self._memory.get(key) for key in keys]
+        missing = [key for key, vector in zip(keys, vectors) if vector is None]
+        return vectors, missing if self._db is not None else []
+
+    def _fill(self, keys: list, vectors: list, found: dict) -> list:
+        for i, key in enumerate(keys):
+            if vectors[i] is not None:
+                continue
+            if key in found:
+                vectors[i], created_at = found[key]
+                self._memory.put(key, vectors[i], created_at=created_at)
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        return vectors
+
+    def _remember(self, items: list) -> list:
+        # Store (key, vector) pairs in memory; returns the rows to write to disk
+        created_at = time.time()
+        for key, vector in items:
+            self._memory.put(key, vector, created_at=created_at)
+        if self._db is None:
+            return []
+        return [(key, np.asarray(vector, dtype=np.float32).tobytes(), created_at) for key, vector in items]
+
+    def get_many(self, keys: list) -> list:
+        vectors, missing = self._memory_lookup(keys)
+        return self._fill(keys, vectors, self._read(missing) if missing else {})
+
+    async def get_many_async(self, keys: list) -> list:
+        vectors, missing = self._memory_lookup(keys)
+        found = await asyncio.to_thread(self._read, missing) if missing else {}
+        return self._fill(keys, vectors, found)
+
+    def get(self, key: str) -> list | None:
+        return self.get_many([key])[0]
+
+    def put_many(self, items: list):
+        if rows := self._remember(items):
+            self._write(rows)
+
+    async def put_many_async(self, items: list):
+        if rows := self._remember(items):
+            await asyncio.to_thread(self._write, rows)
+
+    def put(self, key: str, vector: list):
+        self.put_many([(key, vector)])
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "size": memory["size"],
+            "max_size": memory["max_size"],
+            "hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": memory["evictions"],
+            "purged": self.purged,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
@@ -1,19 +1,125 @@
 import re
-from fastapi import FastAPI, status
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request, status
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from groq import Groq
-from config import GROQ_API_KEY
-from retrieval import retrieve_from_qdrant
-from fastapi.responses import JSONResponse
+from config import (
+    GROQ_API_KEY, LLM_CONCURRENCY, RERANK_CACHE_SIZE, RERANK_CACHE_TTL,
+    LATENCY_BUDGET_MS, RERANK_HEDGE, RERANK_HEDGE_PERCENTILE, RERANK_HEDGE_MIN_SAMPLES,
+    RERANK_MODE, RERANK_FALLBACK, LOCAL_RERANK_WEIGHTS, RERANK_DESCRIPTION_TOKENS,
+    BATCH_MAX_QUERIES, PROFILING_ENABLED, RESPONSE_COMPRESS_MIN_BYTES, RESPONSE_CACHE_MAX_AGE,
+    WARMUP_ENABLED, READY_CHECK_TTL, READY_CHECK_TIMEOUT, COALESCE_REQUESTS,
+    SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL
+)
+from retrieval import (
+    retrieve_batch_async, retrieve_embedded_async, embed_queries_async, embedding_cache,
+    check_embedding, check_vector_store
+)
+from cache import TTLCache
+from catalog import (
+    TEST_TYPE_MAPPING, TEST_TYPE_CODES,
+    parse_duration, split_test_types, normalize_test_types, summarize_description
+)
+from embedding_cache import normalize_text
+from hedging import LatencyTracker, hedged_call
+from local_rerank import local_rerank
+from query_processing import split_query, summarize_query, pool_embeddings
+from rerank_policy import plan_rerank
+from profiling import SamplingProfiler
+from http_cache import CompactJSONResponse, cached_json_response
+from readiness import DependencyMonitor
+from singleflight import SingleFlight
+from semantic_cache import SemanticCache
+import metrics
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+import hashlib
 import json
 
-app = FastAPI()
-groq_client = Groq(api_key=GROQ_API_KEY)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the port binds immediately; /ready reports progress
+    task = asyncio.create_task(warmup()) if WARMUP_ENABLED else None
+    yield
+    if task:
+        task.cancel()
+
+app = FastAPI(lifespan=lifespan)
+# Gzip for large bodies; /recommend brotli-encodes itself when the client accepts br
+app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_COMPRESS_MIN_BYTES)
+
+# Created on first use (or by the warmup) to keep the SDK import off the startup path
+groq_client = None
+
+# Bound in-flight LLM calls per worker
+llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Successful LLM orderings (as candidate URLs), keyed on query + candidate set
+rerank_cache = TTLCache(max_size=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+
+# Recent LLM latencies, used to pick the hedge delay
+llm_latency = LatencyTracker()
+
+# In-flight /recommend pipelines, so identical concurrent requests share one
+inflight = SingleFlight()
+
+# LLM slots for /recommend/batch queries; a query's budget starts once it holds one,
+# so a large batch queues instead of running out of time waiting on llm_semaphore
+batch_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Final rankings by query embedding, so paraphrased queries skip search and rerank
+semantic_cache = SemanticCache(
+    max_size=SEMANTIC_CACHE_SIZE,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL
+)
+
+def get_groq_client():
+    global groq_client
+    if groq_client is None:
+        from groq import AsyncGroq
+        groq_client = AsyncGroq(api_key=GROQ_API_KEY)
+    return groq_client
+
+async def load_groq_client():
+    # Import the SDK off the event loop on first use
+    return groq_client if groq_client is not None else await asyncio.to_thread(get_groq_client)
+
+async def check_llm() -> dict:
+    # Cheap authenticated call that also opens the connection pool
+    client = await load_groq_client()
+    await client.models.list()
+    return {}
+
+# The LLM is optional: without it requests fall back to RERANK_FALLBACK
+dependency_monitor = DependencyMonitor(
+    {
+        "embedding": (check_embedding, True),
+        "vector_store": (check_vector_store, True),
+        "llm": (check_llm, False)
+    },
+    ttl=READY_CHECK_TTL,
+    timeout=READY_CHECK_TIMEOUT
+)
+
+async def warmup():
+    # Builds every client, pages in the index and sends one embed
+    start = time.perf_counter()
+    state = await dependency_monitor.refresh()
+    failed = [name for name, result in state["dependencies"].items() if not result["ok"]]
+    print(f"Warmup finished in {time.perf_counter() - start:.2f}s"
+          + (f", failing: {', '.join(failed)}" if failed else ""))
 
 class RecommendationRequest(BaseModel):
     query: str
     max_duration: int = None
-    test_type: str = None
+    test_type: str | list[str] = None
+    latency_budget_ms: int = None  # Overrides LATENCY_BUDGET_MS for this request
+    rerank_mode: str = None  # "llm" or "local", overrides RERANK_MODE
+
+class BatchRecommendationRequest(BaseModel):
+    requests: list[RecommendationRequest]
     
 class IndentedJSONResponse(JSONResponse):
     def render(self, content: any) -> bytes:
@@ -24,97 +130,265 @@ class IndentedJSONResponse(JSONResponse):
             default=str  # Handle non-serializable types
         ).encode("utf-8")
 
-def llm_rerank(query: str, candidates: list) -> list:
-    
-    messages = [{
-    "role": "system",
-    "content": (
-        "You are a reranking assistant for assessments. Follow these rules strictly:\n"
-        "1. Return ONLY assessment NAMES wrapped in || (e.g., ||Java Coding Test||)\n"
-        "2. List exactly 10 names in relevance order\n"
-        "3. Never add explanations or formatting\n"
-        "4. Use ONLY these delimiters: ||\n"
-        "5. Never use markdown\n"
-        "6. Maintain exact spelling from context\n"
-        "Example response:\n"
-        "||Assessment 1||\n||Assessment 2||\n..."
-    )
-    }, {
-        "role": "user", 
+def validate_request(request: RecommendationRequest) -> tuple[list, str]:
+    # Raises ValueError for unknown test types or rerank modes
+    test_types = normalize_test_types(request.test_type)
+    rerank_mode = (request.rerank_mode or RERANK_MODE).lower()
+    if rerank_mode not in ("llm", "local"):
+        raise ValueError(f"Unknown rerank mode: {rerank_mode}")
+    return test_types, rerank_mode
+
+def format_assessment(c: dict) -> dict:
+    return {
+        "name": c.get("name"),
+        "url": c["url"],
+        "adaptive_support": c["adaptive_support"],
+        "description": c["description"],
+        "duration": parse_duration(c.get('duration')),
+        "remote_support": c["remote_testing"],
+        "test_type": split_test_types(c["test_type"])
+    }
+
+def recommendation_content(ranked: list, rerank_method: str, rerank_path: str = "full") -> dict:
+    return {
+        "reranked": rerank_method != "vector",
+        "rerank_method": rerank_method,
+        "rerank_path": rerank_path,
+        "recommended_assessments": [format_assessment(c) for c in ranked[:10]]
+    }
+
+def build_rerank_messages(query: str, candidates: list) -> list:
+    
+    # Short numeric IDs and precomputed summaries keep the prompt small
+    lines = []
+    for i, c in enumerate(candidates, start=1):
+        summary = summarize_description(c.get('summary') or c['description'], RERANK_DESCRIPTION_TOKENS)
+        codes = "".join(TEST_TYPE_CODES.get(t, "") for t in split_test_types(c['test_type']))
+        duration = parse_duration(c.get('duration'))
+        lines.append(f"[{i}] {c['name']} | {duration or '?'} min | {codes} | {summary}")
+    
+    return [{
+        "role": "system",
         "content": (
-            f"Reorder these assessments for '{query}':\n" +
-            '\n'.join([
-                f"Assessment {i+1}:\n"
-                f"Name: {c['name']}\n"
-                f"Context: {c['description']}\n"
-                f"Duration: {c['duration']} mins\n"
-                f"Test Type: {c['test_type']}\n"
-                f"Remote Testing: {c['remote_testing']}\n"
-                f"Adaptive Support: {c['adaptive_support']}\n"
-                for i, c in enumerate(candidates)
-            ]) +
-            "\nReturn only the top 10 sorted names."
+            "You rank assessments for a hiring query. Reply with ONLY the IDs of the "
+            "10 most relevant assessments, most relevant first, comma-separated (e.g. 4,1,9). "
+            "No other text.\n"
+            "Format: [ID] name | duration | type codes | summary. Type codes: " +
+            ", ".join(f"{code}={name}" for code, name in TEST_TYPE_MAPPING.items())
         )
+    }, {
+        "role": "user",
+        "content": f"Query: {query}\nAssessments:\n" + "\n".join(lines)
     }]
+
+ID_LIST_PATTERN = re.compile(r'\d+(?:\s*,\s*\d+)+')
+LIST_MARKER_PATTERN = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+LEADING_ID_PATTERN = re.compile(r'^\s*\[?(\d+)\]?(?![\d.)])')
+
+def parse_ranked_ids(content: str, count: int) -> list:
+    # 1-based IDs from the reply -> unique 0-based candidate indexes. The first
+    # comma-separated list wins; failing that, one leading ID per line after any
+    # list marker, so numbering ("1. 4") and echoed names ("Java 8") are ignored
+    if match := ID_LIST_PATTERN.search(content):
+        ids = re.findall(r'\d+', match.group())
+    else:
+        ids = [
+            m.group(1) for line in content.splitlines()
+            if (m := LEADING_ID_PATTERN.match(LIST_MARKER_PATTERN.sub('', line, count=1)))
+        ]
     
-    try:
-        response = groq_client.chat.completions.create(
+    indexes = []
+    for match in ids:
+        index = int(match) - 1
+        if 0 <= index < count and index not in indexes:
+            indexes.append(index)
+    return indexes
+
+def rerank_cache_key(query: str, candidates: list) -> str:
+    urls = "\n".join(sorted(c['url'] for c in candidates))
+    return normalize_text(query) + "\x00" + hashlib.sha256(urls.encode("utf-8")).hexdigest()
+
+async def complete_once(messages: list) -> str:
+    
+    client = await load_groq_client()
+    async with llm_semaphore:
+        start = time.perf_counter()
+        response = await client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=messages,
             temperature=0.3
         )
+        llm_latency.record(time.perf_counter() - start)
+    
+    if usage := getattr(response, "usage", None):
+        print(f"LLM rerank tokens: {usage.prompt_tokens} prompt, {usage.completion_tokens} completion")
+    
+    return response.choices[0].message.content
+
+async def stream_ranked_ids(messages: list, count: int):
+    # Yield candidate indexes from a streamed completion as each ID closes
+    client = await load_groq_client()
+    async with llm_semaphore:
+        stream = await client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=messages,
+            temperature=0.3,
+            stream=True
+        )
         
-        content = response.choices[0].message.content
-        
-        matches = re.findall(r'\|\|(.*?)\|\|', content)
+        text = ""
+        seen = []
+        async for chunk in stream:
+            text += chunk.choices[0].delta.content or ""
+            # An ID is complete once a non-digit follows it
+            for index in parse_ranked_ids(re.sub(r'\d+$', '', text), count):
+                if index not in seen:
+                    seen.append(index)
+                    yield index
         
-        # Robust parsing
-        if not matches:
-            matches = re.findall(r'\d+\.\s+(.*?)(?:\s*-|\(|$)', content)
-        if not matches:
-            matches = re.findall(r'-\s+(.*?)(?:\s*-|\(|$)', content)    
+        for index in parse_ranked_ids(text, count):
+            if index not in seen:
+                seen.append(index)
+                yield index
+
+def hedge_delay() -> float | None:
+    # Hedge only once there is enough latency history to pick a percentile
+    if not RERANK_HEDGE or len(llm_latency) < RERANK_HEDGE_MIN_SAMPLES:
+        return None
+    return llm_latency.percentile(RERANK_HEDGE_PERCENTILE)
+
+def top_up(ranked: list, candidates: list) -> list:
+    # Exactly 10 results when there are enough, padded in retrieval order
+    return (ranked + [c for c in candidates if c not in ranked])[:10]
+
+def cached_llm_order(query: str, candidates: list) -> list | None:
+    if (cached_urls := rerank_cache.get(rerank_cache_key(query, candidates))) is None:
+        return None
+    by_url = {c['url']: c for c in candidates}
+    return [by_url[url] for url in cached_urls]
+
+def store_llm_order(query: str, candidates: list, ranked: list):
+    rerank_cache.put(rerank_cache_key(query, candidates), [c['url'] for c in ranked])
+
+def rank_locally(query: str, request: RecommendationRequest, candidates: list, test_types: list) -> list:
+    with metrics.stage("local_rerank"):
+        return local_rerank(query, candidates, request.max_duration, test_types, LOCAL_RERANK_WEIGHTS)
+
+def plan_candidates(candidates: list, rerank_mode: str) -> tuple[list, str]:
+    # Only pay for the LLM when the similarity scores leave the order open
+    if rerank_mode == "local":
+        return candidates, "full"
+    rerank_set, rerank_path = plan_rerank(candidates)
+    if rerank_path != "full":
+        metrics.count(f"rerank_{rerank_path}")
+    return rerank_set, rerank_path
+
+def settled_ranking(query: str, request: RecommendationRequest, candidates: list, test_types: list,
+                    rerank_mode: str, rerank_set: list, rerank_path: str) -> tuple[list, str] | None:
+    """(ranked, rerank_method) when no LLM call is needed, otherwise None.
 
-        ranked_names = [name.strip() for name in matches if name.strip()]
+    That is local mode, a skipped rerank, or a cached LLM ordering of this
+    rerank set.
+    """
+    if rerank_mode == "local":
+        return rank_locally(query, request, candidates, test_types), "local"
+    if rerank_path == "skipped":
+        return rerank_set[:10], "vector"
+    if (cached := cached_llm_order(query, rerank_set)) is not None:
+        return cached, "llm"
+    return None
+
+def fallback_ranking(query: str, request: RecommendationRequest, candidates: list,
+                     test_types: list) -> tuple[list, str]:
+    # No usable LLM ordering: degrade to the local reranker or vector order
+    metrics.count("rerank_fallback")
+    if RERANK_FALLBACK == "local":
+        return rank_locally(query, request, candidates, test_types), "local"
+    return candidates[:10], "vector"
+
+def assessment_events(ranked: list) -> list:
+    return [
+        sse_event("assessment", {"rank": rank, "assessment": format_assessment(c)})
+        for rank, c in enumerate(ranked[:10], start=1)
+    ]
+
+async def llm_rerank(query: str, candidates: list, timeout: float | None = None) -> tuple[list, bool]:
+    """Rerank candidates with the LLM within `timeout` seconds.
+
+    Returns (ranked, reranked); on timeout or error the candidates are
+    returned in vector-similarity order with reranked=False.
+    """
+    
+    messages = build_rerank_messages(query, candidates)
+    
+    try:
+        with metrics.stage("llm_rerank"):
+            content = await asyncio.wait_for(
+                hedged_call(lambda: complete_once(messages), hedge_delay()),
+                timeout=timeout
+            )
         
-        if len(ranked_names) < 10:
-            missing = 10 - len(ranked_names)
-            ranked_names += [c['name'] for c in candidates if c['name'] not in ranked_names][:missing]
+        order = parse_ranked_ids(content, len(candidates))
+        parsed_count = len(order)
+        if not parsed_count:
+            metrics.count("llm_parse_failure")
         
-        # Create name-to-candidate mapping
-        candidate_map = {c['name'].lower().strip(): c for c in candidates}
+        result = top_up([candidates[i] for i in order], candidates)
         
-        # Convert ranked_names to candidate dictionaries
-        ranked = []
-        for name in ranked_names:
-            # Exact match
-            clean_name = name.lower().strip()
-            if clean_name in candidate_map:
-                ranked.append(candidate_map[clean_name])
-                continue
-                
-            # Partial match fallback
-            for cname, candidate in candidate_map.items():
-                if clean_name in cname or cname in clean_name:
-                    ranked.append(candidate)
-                    break
+        # Only cache orderings the LLM actually produced
+        if parsed_count:
+            store_llm_order(query, candidates, result)
         
-            
-        # Ensure exactly 10 items
-        return (ranked + [c for c in candidates if c not in ranked])[:10]
+        return result, parsed_count > 0
 
+    except asyncio.TimeoutError:
+        print(f"LLM rerank exceeded {timeout:.2f}s budget, using vector order")
+        metrics.count("llm_timeout")
+        return candidates[:10], False
     except Exception as e:
         print(f"LLM Error: {str(e)}")
-        return candidates[:10]  # Fallback mechanism
+        metrics.count("llm_error")
+        return candidates[:10], False  # Fallback mechanism
+
+async def rerank_candidates(request: RecommendationRequest, candidates: list, test_types: list,
+                            rerank_mode: str, deadline: float,
+                            llm_slot: asyncio.Semaphore | None = None) -> tuple[list, str, str]:
+    """Returns (ranked, rerank_method, rerank_path).
+
+    The method is llm, local or vector; the path (see rerank_policy) says
+    whether the LLM saw every candidate, a pruned set, or was skipped.
+    With `llm_slot`, the LLM call first waits for a slot and the deadline
+    is pushed back by that wait.
+    """
     
-def parse_duration(duration) -> int | None:
-    try:
-        # Direct integer conversion
-        return int(duration)
-    except (TypeError, ValueError):
-        # Extract first numeric sequence from strings
-        if match := re.search(r'\d+', str(duration)):
-            return int(match.group())
-    return None
+    # A long job description is cut down so the prompt stays bounded
+    query = summarize_query(request.query)
+    
+    rerank_set, rerank_path = plan_candidates(candidates, rerank_mode)
+    settled = settled_ranking(query, request, candidates, test_types, rerank_mode, rerank_set, rerank_path)
+    if settled is not None:
+        return (*settled, rerank_path)
+    
+    # LLM reranking
+    if llm_slot is None:
+        ranked, reranked = await llm_rerank(
+            query,
+            rerank_set,
+            timeout=max(deadline - time.monotonic(), 0)
+        )
+    else:
+        queued = time.monotonic()
+        async with llm_slot:
+            deadline += time.monotonic() - queued
+            ranked, reranked = await llm_rerank(
+                query,
+                rerank_set,
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+    if not reranked:
+        return (*fallback_ranking(query, request, candidates, test_types), rerank_path)
+    
+    return top_up(ranked, candidates), "llm", rerank_path
 
 @app.get("/", response_class=IndentedJSONResponse)
 async def root():
@@ -123,8 +397,20 @@ async def root():
         "endpoints": [
             {"path": "/health", "method": "GET", 
              "description": "Health check endpoint"},
+            {"path": "/ready", "method": "GET",
+             "description": "Readiness: embedding, vector store and LLM status (503 until ready)"},
             {"path": "/recommend", "method": "POST", 
-             "description": "Get assessment recommendations based on a Natural Language query"}
+             "description": "Get assessment recommendations based on a Natural Language query"},
+            {"path": "/recommend", "method": "GET",
+             "description": "Cacheable variant of POST /recommend taking query parameters"},
+            {"path": "/recommend/stream", "method": "POST",
+             "description": "Server-Sent Events: candidates, each reranked assessment, then the final list"},
+            {"path": "/recommend/batch", "method": "POST",
+             "description": "Recommendations for many queries with per-query results and errors"},
+            {"path": "/stats", "method": "GET",
+             "description": "Cache statistics"},
+            {"path": "/metrics", "method": "GET",
+             "description": "Prometheus metrics: stage latencies, cache and fallback counters"}
         ],
         "version": "1.0.0"
     }
@@ -138,36 +424,371 @@ async def health_check():
         media_type="application/json"
     )
 
-@app.post("/recommend", response_class=IndentedJSONResponse)
-async def recommend(request: RecommendationRequest):
+@app.get("/ready", response_class=IndentedJSONResponse)
+async def ready():
+    state = await dependency_monitor.state()
+    return JSONResponse(
+        content=state,
+        status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+@app.get("/stats", response_class=IndentedJSONResponse)
+async def stats():
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "rerank_cache": rerank_cache.stats(),
+        "semantic_cache": semantic_cache.stats()
+    }
+
+def cache_gauges() -> dict:
+    gauges = {}
+    for name, cache in (("embedding", embedding_cache), ("rerank", rerank_cache), ("semantic", semantic_cache)):
+        for key, value in cache.stats().items():
+            if key != "max_size":
+                gauges[(f"cache_{key}", (("cache", name),))] = value
+    return gauges
+
+metrics.registry.register_gauges(cache_gauges)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.post("/recommend", response_class=CompactJSONResponse)
+async def recommend(request: RecommendationRequest, http_request: Request,
+                    profile: bool = False, pretty: bool = False):
+    return await recommend_response(request, http_request, profile, pretty, "no-cache")
+
+@app.get("/recommend", response_class=CompactJSONResponse)
+async def recommend_get(http_request: Request, query: str, max_duration: int = None,
+                        test_type: list[str] = Query(None), latency_budget_ms: int = None,
+                        rerank_mode: str = None, profile: bool = False, pretty: bool = False):
+    params = {
+        "max_duration": max_duration,
+        "test_type": test_type,
+        "latency_budget_ms": latency_budget_ms,
+        "rerank_mode": rerank_mode
+    }
+    request = RecommendationRequest(query=query, **{k: v for k, v in params.items() if v is not None})
+    return await recommend_response(
+        request, http_request, profile, pretty, f"public, max-age={RESPONSE_CACHE_MAX_AGE}"
+    )
+
+async def recommend_response(request: RecommendationRequest, http_request: Request,
+                             profile: bool, pretty: bool, cache_control: str):
+    timer = metrics.start_request_timer()
+    
     try:
-        candidates = retrieve_from_qdrant(request.query, top_k=20)
+        test_types, rerank_mode = validate_request(request)
+    except ValueError as e:
+        metrics.registry.inc("requests_total", endpoint="/recommend", status="400")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Opt-in sampling profile of this request (?profile=true)
+    profiler = SamplingProfiler().start() if profile and PROFILING_ENABLED else None
+    
+    # Deadline for the whole request; the LLM gets whatever retrieval leaves
+    budget_ms = request.latency_budget_ms or LATENCY_BUDGET_MS
+    deadline = time.monotonic() + budget_ms / 1000
+    
+    try:
+        ranked, rerank_method, rerank_path = await coalesced_pipeline(request, test_types, rerank_mode, deadline)
         
-        # Apply filters
-        if request.max_duration:    
-            candidates = [c for c in candidates 
-                         if int(c.get('duration', 0)) <= request.max_duration]
-
-        # LLM reranking
-        ranked = llm_rerank(request.query, candidates)
+        content = recommendation_content(ranked, rerank_method, rerank_path)
+        if profiler:
+            content["profile"] = profiler.stop().report()
+            cache_control = "no-store"
         
-        return JSONResponse(
-            content={
-                "recommended_assessments": [{
-                    "url": c["url"],
-                    "adaptive_support": c["adaptive_support"],
-                    "description": c["description"],
-                    "duration": parse_duration(c.get('duration')),
-                    "remote_support": c["remote_testing"],
-                    "test_type": [ct.strip() for ct in c["test_type"].split(",")]
-                } for c in ranked[:10]]
-            },
-            status_code=status.HTTP_200_OK,
-            media_type="application/json"
+        # ETag covers the ranked result; a matching If-None-Match gets a bodiless 304
+        with metrics.stage("serialize"):
+            response = cached_json_response(
+                http_request, content, pretty,
+                cache_control=cache_control,
+                min_compress_size=RESPONSE_COMPRESS_MIN_BYTES
+            )
+    
+    # Nothing to rank without candidates, so running out of budget before the rerank is a 504
+    except DeadlineExceeded as e:
+        print(f"Recommend timed out: {str(e)}")
+        response = JSONResponse(
+            content={"error": str(e)},
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT
         )
         
     except Exception as e:
-        return JSONResponse(
+        print(f"Recommend failed: {str(e)}")
+        response = JSONResponse(
             content={"error": str(e)},
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+    
+    finally:
+        if profiler and profiler.elapsed is None:
+            profiler.stop()
+    
+    metrics.registry.inc("requests_total", endpoint="/recommend", status=str(response.status_code))
+    metrics.registry.observe("request_duration_seconds", time.perf_counter() - timer.started, endpoint="/recommend")
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+class DeadlineExceeded(Exception):
+    """Embedding or vector search used up the request's latency budget"""
+
+async def within_deadline(awaitable, deadline: float, stage: str):
+    # Bounds an upstream call by what is left of the budget, so a hung provider can't hold the request
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        metrics.count(f"{stage}_timeout")
+        raise DeadlineExceeded(f"{stage.capitalize()} exceeded the latency budget")
+
+async def embed_request_query(query: str) -> list | None:
+    """Chunk embeddings of the query, one batched call however long it is; None on failure"""
+    try:
+        return await embed_queries_async(split_query(query))
+    except Exception as e:
+        print(f"Retrieval failed: {str(e)}")
+        metrics.count("retrieval_error")
+        return None
+
+async def run_pipeline(request: RecommendationRequest, test_types: list, rerank_mode: str,
+                       deadline: float) -> tuple[list, str, str]:
+    # A close paraphrase with the same filters reuses its final ranking
+    scope = (request.max_duration, tuple(sorted(test_types)), rerank_mode)
+    embeddings = await within_deadline(embed_request_query(request.query), deadline, "embedding")
+    embedding = pool_embeddings(embeddings) if embeddings else None
+    if embedding is not None and (cached := semantic_cache.get(embedding, scope)) is not None:
+        metrics.count("semantic_cache_hit")
+        return cached
+    
+    # Filters are applied inside the vector search so top_k already respects them
+    candidates = await within_deadline(retrieve_embedded_async(
+        embeddings,
+        top_k=20,
+        filters={"max_duration": request.max_duration, "test_type": test_types}
+    ), deadline, "search") if embeddings else []
+
+    ranked, rerank_method, rerank_path = await rerank_candidates(
+        request, candidates, test_types, rerank_mode, deadline
+    )
+    
+    # Fallback orderings are not cached, so paraphrases still get a proper rerank later
+    if embedding is not None and ranked and (rerank_method == rerank_mode or rerank_path == "skipped"):
+        semantic_cache.put(embedding, (ranked, rerank_method, rerank_path), scope)
+    return ranked, rerank_method, rerank_path
+
+async def coalesced_pipeline(request: RecommendationRequest, test_types: list, rerank_mode: str,
+                             deadline: float) -> tuple[list, str, str]:
+    """run_pipeline, shared between identical concurrent requests.
+
+    Only requests with the same latency budget share a run, so a tight
+    budget never times out or degrades a duplicate with a looser one. A
+    duplicate waits at most its own remaining budget, and runs alone if that
+    wait expires or the shared run ran out of time before this caller did.
+    """
+    if not COALESCE_REQUESTS:
+        return await run_pipeline(request, test_types, rerank_mode, deadline)
+    
+    budget_ms = request.latency_budget_ms or LATENCY_BUDGET_MS
+    key = (normalize_text(request.query), request.max_duration, tuple(sorted(test_types)), rerank_mode, budget_ms)
+    joining = key in inflight
+    try:
+        result, shared = await inflight.do(
+            key,
+            lambda: run_pipeline(request, test_types, rerank_mode, deadline),
+            timeout=max(deadline - time.monotonic(), 0)
+        )
+    except asyncio.TimeoutError:
+        metrics.count("coalesce_timeout")
+        return await run_pipeline(request, test_types, rerank_mode, deadline)
+    except DeadlineExceeded:
+        # The shared run started earlier, so its deadline may have passed before ours
+        if not joining or time.monotonic() >= deadline:
+            raise
+        metrics.count("coalesce_retry")
+        return await run_pipeline(request, test_types, rerank_mode, deadline)
+    
+    if shared:
+        metrics.count("coalesced")
+    return result
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/recommend/stream")
+async def recommend_stream(request: RecommendationRequest):
+    try:
+        test_types, rerank_mode = validate_request(request)
+    except ValueError as e:
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    budget_ms = request.latency_budget_ms or LATENCY_BUDGET_MS
+    deadline = time.monotonic() + budget_ms / 1000
+    
+    async def events():
+        try:
+            embeddings = await within_deadline(embed_request_query(request.query), deadline, "embedding")
+            candidates = await within_deadline(retrieve_embedded_async(
+                embeddings,
+                top_k=20,
+                filters={"max_duration": request.max_duration, "test_type": test_types}
+            ), deadline, "search") if embeddings else []
+            query = summarize_query(request.query)
+            
+            # 1. Vector-retrieval candidates, available immediately
+            yield sse_event("candidates", {
+                "candidates": [format_assessment(c) for c in candidates[:10]]
+            })
+            
+            rerank_set, rerank_path = plan_candidates(candidates, rerank_mode)
+            settled = settled_ranking(query, request, candidates, test_types, rerank_mode, rerank_set, rerank_path)
+            
+            if settled is not None:
+                ranked, rerank_method = settled
+                for event in assessment_events(ranked):
+                    yield event
+            
+            else:
+                # 2. Stream the LLM ordering through a queue so the deadline
+                # never cancels the response task itself
+                queue = asyncio.Queue()
+                
+                async def produce() -> bool:
+                    try:
+                        messages = build_rerank_messages(query, rerank_set)
+                        async for index in stream_ranked_ids(messages, len(rerank_set)):
+                            await queue.put(index)
+                        return True
+                    except Exception as e:
+                        print(f"LLM Error: {str(e)}")
+                        metrics.count("llm_error")
+                        return False
+                    finally:
+                        await queue.put(None)
+                
+                producer = asyncio.create_task(produce())
+                streamed = []
+                completed = False  # Only a finished stream is a usable LLM ordering
+                try:
+                    while len(streamed) < min(10, len(rerank_set)):
+                        index = await asyncio.wait_for(
+                            queue.get(), timeout=max(deadline - time.monotonic(), 0)
+                        )
+                        if index is None:
+                            completed = await producer
+                            break
+                        streamed.append(rerank_set[index])
+                        yield sse_event("assessment", {
+                            "rank": len(streamed),
+                            "assessment": format_assessment(rerank_set[index])
+                        })
+                    else:
+                        completed = True
+                except asyncio.TimeoutError:
+                    print(f"LLM rerank exceeded {budget_ms / 1000:.2f}s budget, using vector order")
+                    metrics.count("llm_timeout")
+                finally:
+                    producer.cancel()
+                
+                if completed and streamed:
+                    ranked, rerank_method = top_up(streamed, rerank_set), "llm"
+                    store_llm_order(query, rerank_set, ranked)
+                else:
+                    ranked, rerank_method = fallback_ranking(query, request, candidates, test_types)
+                    # Vector order is already on the client as the candidates event
+                    if rerank_method == "local":
+                        for event in assessment_events(ranked):
+                            yield event
+            
+            # 3. Final ordered list, topped up with vector order
+            yield sse_event("final", recommendation_content(
+                top_up(ranked, candidates), rerank_method, rerank_path
+            ))
+        
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/recommend/batch", response_class=CompactJSONResponse)
+async def recommend_batch(batch: BatchRecommendationRequest, http_request: Request, pretty: bool = False):
+    if len(batch.requests) > BATCH_MAX_QUERIES:
+        return JSONResponse(
+            content={"error": f"At most {BATCH_MAX_QUERIES} queries per batch"},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    results = [{"query": request.query} for request in batch.requests]
+    
+    # Validation errors stay with their query; the rest go through the pipeline
+    valid = []
+    for i, request in enumerate(batch.requests):
+        try:
+            valid.append((i, request, *validate_request(request)))
+        except ValueError as e:
+            results[i]["error"] = str(e)
+    
+    started = time.monotonic()
+    # The shared retrieval step may run until the most generous budget in the batch
+    retrieval_deadline = started + max(
+        (request.latency_budget_ms or LATENCY_BUDGET_MS for _, request, _, _ in valid),
+        default=LATENCY_BUDGET_MS
+    ) / 1000
+    
+    try:
+        # One batched embedding call and one multi-search for all queries
+        candidate_lists = await within_deadline(
+            retrieve_batch_async(
+                [request.query for _, request, _, _ in valid],
+                top_k=20,
+                filters_list=[
+                    {"max_duration": request.max_duration, "test_type": test_types}
+                    for _, request, test_types, _ in valid
+                ]
+            ),
+            retrieval_deadline,
+            "retrieval"
+        )
+    except DeadlineExceeded as e:
+        for i, *_ in valid:
+            results[i]["error"] = str(e)
+        return cached_json_response(
+            http_request, {"results": results}, pretty, min_compress_size=RESPONSE_COMPRESS_MIN_BYTES
+        )
+    except Exception as e:
+        for i, *_ in valid:
+            results[i]["error"] = f"Retrieval failed: {str(e)}"
+        return cached_json_response(
+            http_request, {"results": results}, pretty, min_compress_size=RESPONSE_COMPRESS_MIN_BYTES
+        )
+    
+    async def rerank_one(i, request, test_types, rerank_mode, candidates):
+        try:
+            deadline = started + (request.latency_budget_ms or LATENCY_BUDGET_MS) / 1000
+            ranked, rerank_method, rerank_path = await rerank_candidates(
+                request, candidates, test_types, rerank_mode, deadline, llm_slot=batch_llm_slots
+            )
+            results[i].update(recommendation_content(ranked, rerank_method, rerank_path))
+            # The requested reranker did not produce this ordering (timeout, LLM error)
+            results[i]["degraded"] = rerank_method != rerank_mode and rerank_path != "skipped"
+        except Exception as e:
+            results[i]["error"] = str(e)
+    
+    # LLM calls are bounded by batch_llm_slots and llm_semaphore
+    await asyncio.gather(*[
+        rerank_one(*item, candidates) for item, candidates in zip(valid, candidate_lists)
+    ])
+    
+    return cached_json_response(
+        http_request, {"results": results}, pretty, min_compress_size=RESPONSE_COMPRESS_MIN_BYTES
+    )
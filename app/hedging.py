@@ -0,0 +1,50 @@
+import asyncio
+from collections import deque
+import numpy as np
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        return float(np.percentile(self._samples, q))
+
+
+async def hedged_call(make_call, hedge_delay: float | None = None):
+    """Await `make_call()`, firing a second identical call if the first has not
+    finished after `hedge_delay` seconds. The first successful result wins and
+    the other call is cancelled. Without a delay this is a plain await.
+    """
+    primary = asyncio.ensure_future(make_call())
+    if hedge_delay is None:
+        return await primary
+
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done:
+            tasks.add(asyncio.ensure_future(make_call()))
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,74 @@
+import hashlib
+import json
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dumps(content, pretty: bool = False) -> bytes:
+    """Compact UTF-8 JSON (orjson when installed); indented only if `pretty`"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(content, default=str, option=option)
+    return json.dumps(
+        content,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+        ensure_ascii=False,
+        default=str
+    ).encode("utf-8")
+
+
+class CompactJSONResponse(JSONResponse):
+    def render(self, content: any) -> bytes:
+        return dumps(content)
+
+
+def make_etag(body: bytes) -> str:
+    # Weak: pretty, compact and compressed bodies are the same representation
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def cached_json_response(http_request: Request, content: dict, pretty: bool = False,
+                         cache_control: str = "no-cache", min_compress_size: int = 1000) -> Response:
+    """JSON response with a content ETag, answering If-None-Match with 304.
+
+    Bodies over `min_compress_size` are brotli-compressed here when the client
+    accepts it; gzip is left to GZipMiddleware, which skips encoded bodies.
+    The middleware adds Vary to what it handles, so it is set here only on
+    the brotli and 304 responses it passes through untouched.
+    """
+    body = dumps(content)
+    headers = {"ETag": make_etag(body), "Cache-Control": cache_control}
+
+    if etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+
+    if pretty:
+        body = dumps(content, pretty=True)
+
+    accepted = http_request.headers.get("accept-encoding", "")
+    if brotli is not None and "br" in accepted and len(body) >= min_compress_size:
+        body = brotli.compress(body, quality=5)
+        headers["Content-Encoding"] = "br"
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,96 @@
+import re
+from functools import lru_cache
+import numpy as np
+from catalog import parse_duration, split_test_types
+
+# Feature weights; the score is a weighted sum of features in [0, 1]
+DEFAULT_WEIGHTS = {
+    "similarity": 1.0,
+    "lexical": 0.6,
+    "duration": 0.3,
+    "test_type": 0.3,
+    "remote": 0.05,
+    "adaptive": 0.05
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "for", "from", "in", "is", "of", "on",
+    "or", "the", "to", "with", "who", "that", "this", "can", "need", "want", "looking",
+    "hire", "hiring", "test", "tests", "assessment", "assessments", "min", "mins", "minutes", "max"
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+def tokenize(text: str) -> frozenset:
+    return frozenset(t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS)
+
+
+@lru_cache(maxsize=4096)
+def _candidate_tokens(name: str, description: str) -> frozenset:
+    # Catalog text repeats across requests, so tokenise each product once
+    return tokenize(f"{name} {description}")
+
+
+def feature_matrix(query: str, candidates: list, max_duration: int | None = None,
+                   test_types: list | None = None) -> np.ndarray:
+    """(n_candidates, n_features) matrix, columns in DEFAULT_WEIGHTS order"""
+    n = len(candidates)
+
+    # Vector similarity, min-max scaled within this candidate set
+    similarity = np.array([c.get("score", 0.0) for c in candidates], dtype=np.float32)
+    spread = similarity.max() - similarity.min() if n else 0
+    similarity = (similarity - similarity.min()) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+
+    # Fraction of query terms found in the name/description
+    query_terms = sorted(tokenize(query))
+    if query_terms:
+        presence = np.array([
+            [term in _candidate_tokens(c.get("name", ""), c.get("description", "")) for term in query_terms]
+            for c in candidates
+        ], dtype=np.float32).reshape(n, len(query_terms))
+        lexical = presence.mean(axis=1)
+    else:
+        lexical = np.zeros(n, dtype=np.float32)
+
+    # 1 inside the limit, decaying linearly to 0 at twice the limit; unknown is neutral
+    durations = np.array(
+        [np.nan if (d := parse_duration(c.get("duration"))) is None else d for c in candidates],
+        dtype=np.float32
+    )
+    if max_duration:
+        duration = np.clip(1 - (durations - max_duration) / max_duration, 0, 1)
+        duration = np.where(np.isnan(durations), 0.5, duration)
+    else:
+        duration = np.zeros(n, dtype=np.float32)
+
+    # Fraction of requested test types the candidate covers
+    if test_types:
+        wanted = set(test_types)
+        test_type = np.array(
+            [len(wanted.intersection(split_test_types(c.get("test_type")))) / len(wanted) for c in candidates],
+            dtype=np.float32
+        )
+    else:
+        test_type = np.zeros(n, dtype=np.float32)
+
+    remote = np.array([c.get("remote_testing") == "Yes" for c in candidates], dtype=np.float32)
+    adaptive = np.array([c.get("adaptive_support") == "Yes" for c in candidates], dtype=np.float32)
+
+    return np.column_stack([similarity, lexical, duration, test_type, remote, adaptive]).reshape(n, -1)
+
+
+def local_rerank(query: str, candidates: list, max_duration: int | None = None,
+                 test_types: list | None = None, weights: dict | None = None, top_n: int = 10) -> list:
+    """Rank candidates by a weighted sum of cheap features, without an LLM"""
+    if not candidates:
+        return []
+
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    w = np.array([weights[name] for name in DEFAULT_WEIGHTS], dtype=np.float32)
+
+    scores = feature_matrix(query, candidates, max_duration, test_types) @ w
+
+    # Stable sort keeps vector order for ties
+    order = np.argsort(-scores, kind="stable")[:top_n]
+    return [candidates[i] for i in order]
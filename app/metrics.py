@@ -0,0 +1,118 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Stage latency histogram buckets (seconds)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_timer = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Per-request stage durations, reported as a Server-Timing header"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        return ", ".join(entries + [f"total;dur={total * 1000:.1f}"])
+
+
+class MetricsRegistry:
+    """Minimal in-process counters and histograms with Prometheus text output"""
+
+    def __init__(self, prefix: str = "shl"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauge_sources = []
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts, total, count = self._histograms.get(key, ([0] * len(BUCKETS), 0.0, 0))
+            counts = [c + (value <= bound) for c, bound in zip(counts, BUCKETS)]
+            self._histograms[key] = (counts, total + value, count + 1)
+
+    def register_gauges(self, source):
+        """`source()` returns {(name, labels_tuple): value}, read at scrape time"""
+        self._gauge_sources.append(source)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{self.prefix}_{name}{_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {self.prefix}_{name} histogram")
+            for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for bound, bucket_count in zip(BUCKETS, counts):
+                    lines.append(f"{self.prefix}_{name}_bucket{_labels(labels + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.prefix}_{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.prefix}_{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{self.prefix}_{name}_count{_labels(labels)} {count}")
+
+        gauges = {}
+        for source in self._gauge_sources:
+            gauges.update(source())
+        for name in sorted({name for name, _ in gauges}):
+            lines.append(f"# TYPE {self.prefix}_{name} gauge")
+            for (n, labels), value in sorted(gauges.items()):
+                if n == name:
+                    lines.append(f"{self.prefix}_{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+registry = MetricsRegistry()
+
+
+def start_request_timer() -> RequestTimer:
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def count(event: str, amount: float = 1):
+    registry.inc("events_total", amount, event=event)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage into the histogram and the current request's timer"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("stage_duration_seconds", elapsed, stage=name)
+        if (timer := _current_timer.get()) is not None:
+            timer.add(name, elapsed)
@@ -1,49 +1,108 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import argparse
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from config import (
+    CRAWL_CONCURRENCY, CRAWL_RATE_PER_HOST, CRAWL_TIMEOUT, CRAWL_RETRIES, CRAWL_CACHE_DIR,
+    SNAPSHOT_DIR, PARSE_WORKERS
+)
+from catalog import expand_test_type
+from crawler import Crawler
+from snapshots import SnapshotStore, read_snapshot
 
-# Load the CSV data to get URLs and IRT information
-df = pd.read_csv('shl_products.csv')
-
-# Create output file
-with open('shl_product_details.csv', 'w', newline='', encoding='utf-8') as outfile:
-    writer = csv.writer(outfile)
-    writer.writerow(['Name', 'Description', 'URL', 'Remote Testing', 'Adaptive/IRT Support', 'Duration', 'Test Type'])
-    
-    # Process each URL in the CSV
-    for index, row in df.iterrows():
-        name = row['name']
-        url = row['url']
-        irt = row['irt']
-        
-        try:
-            # Fetch the page
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract description
-            description_elem = soup.select_one('.product-catalogue-training-calendar__row h4:contains("Description") + p')
-            description = description_elem.text.strip() if description_elem else "N/A"
-            
-            # Extract duration
-            duration_elem = soup.select_one('.product-catalogue-training-calendar__row h4:contains("Assessment length") + p')
-            duration = duration_elem.text.strip() if duration_elem else "N/A"
-            
-            # Extract Remote Testing
-            remote_test_elem = soup.select_one('.catalogue__circle.-yes')
-            remote_testing = "Yes" if remote_test_elem else "No"
-            
-            # Extract Test Type (the letters)
-            test_type_elem = soup.select('.product-catalogue__key')
-            test_type = ''.join([elem.text.strip() for elem in test_type_elem]) if test_type_elem else "N/A"
-            test_type = test_type[:-8]
-            
-            # Write to CSV
-            writer.writerow([name, description, url, remote_testing, irt, duration, test_type])
-            
-            print(f"Processed: {name}")
-            
-        except Exception as e:
-            print(f"Error processing {url}: {e}")
-            writer.writerow([name, "Error", url, "Error", irt, "Error", "Error"])
+COLUMNS = ['Name', 'Description', 'URL', 'Remote Testing', 'Adaptive/IRT Support', 'Duration', 'Test Type']
+
+def parse_product_page(content: bytes) -> dict:
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Extract description
+    description_elem = soup.select_one('.product-catalogue-training-calendar__row h4:-soup-contains("Description") + p')
+    description = description_elem.text.strip() if description_elem else "N/A"
+
+    # Extract duration
+    duration_elem = soup.select_one('.product-catalogue-training-calendar__row h4:-soup-contains("Assessment length") + p')
+    duration = duration_elem.text.strip() if duration_elem else "N/A"
+
+    # Extract Remote Testing
+    remote_test_elem = soup.select_one('.catalogue__circle.-yes')
+    remote_testing = "Yes" if remote_test_elem else "No"
+
+    # Extract Test Type (the letters), minus the 8-letter legend at the foot of the page
+    test_type_elem = soup.select('.product-catalogue__key')
+    test_type = ''.join([elem.text.strip() for elem in test_type_elem])[:-8]
+
+    return {
+        "description": description,
+        "duration": duration,
+        "remote_testing": remote_testing,
+        "test_type": expand_test_type(test_type)
+    }
+
+def parse_snapshot(path: str | None) -> dict | str:
+    # Runs in a worker process; errors come back as strings so one page can't stop the pool
+    if path is None:
+        return "No snapshot"
+    try:
+        return parse_product_page(read_snapshot(path))
+    except Exception as e:
+        return str(e)
+
+def snapshot_products(crawler: Crawler, urls: list, store: SnapshotStore):
+    # Network stage: fetch every product page concurrently and keep the raw HTML
+    for url, result in zip(urls, crawler.fetch_all(urls)):
+        if isinstance(result, Exception):
+            print(f"Error fetching {url}: {result}")
+        else:
+            store.put(url, result.content)
+
+def write_product_details(store: SnapshotStore, products: pd.DataFrame, output_path: str,
+                          workers: int | None = None):
+    # CPU stage: parse the latest snapshot of each page across a process pool
+    paths = [store.latest(url) for url in products['url']]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(parse_snapshot, paths, chunksize=16))
+
+    with open(output_path, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(COLUMNS)
+
+        for (_, row), details in zip(products.iterrows(), parsed):
+            name, url, irt = row['name'], row['url'], row['irt']
+
+            if isinstance(details, str):
+                print(f"Error processing {url}: {details}")
+                writer.writerow([name, "Error", url, "Error", irt, "Error", "Error"])
+                continue
+
+            writer.writerow([
+                name, details["description"], url, details["remote_testing"],
+                irt, details["duration"], details["test_type"]
+            ])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot SHL product pages and extract the catalog CSV")
+    parser.add_argument("--products", default="app/prepocessing/data/shl_products.csv", help="Output of get_urls.py")
+    parser.add_argument("--output", default="app/data/shl_product_details.csv")
+    parser.add_argument("--skip-fetch", action="store_true", help="Re-parse existing snapshots only")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS or None)
+    args = parser.parse_args()
+
+    # Load the CSV data to get URLs and IRT information
+    df = pd.read_csv(args.products)
+    store = SnapshotStore(SNAPSHOT_DIR)
+
+    if not args.skip_fetch:
+        crawler = Crawler(
+            concurrency=CRAWL_CONCURRENCY,
+            rate_per_host=CRAWL_RATE_PER_HOST,
+            timeout=CRAWL_TIMEOUT,
+            retries=CRAWL_RETRIES,
+            cache_dir=CRAWL_CACHE_DIR
+        )
+        snapshot_products(crawler, df['url'].tolist(), store)
+        crawler.close()
+        print(f"Crawl finished: {crawler.stats}")
+
+    write_product_details(store, df, args.output, args.workers)
+    print(f"Product details saved to {args.output}")
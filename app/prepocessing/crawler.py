@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses worth retrying: rate limits and transient server failures
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    content: bytes
+    from_cache: bool = False  # Server answered 304 and the cached body was reused
+
+
+class ResponseCache:
+    """On-disk HTTP cache: body plus ETag/Last-Modified validators per URL"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + suffix)
+
+    def get(self, url: str) -> tuple[dict, bytes] | None:
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(url, ".body"), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def put(self, url: str, headers, body: bytes):
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": time.time()
+        }
+        # Write-then-rename so a crash never leaves a torn entry
+        for suffix, data in ((".body", body), (".json", json.dumps(meta).encode("utf-8"))):
+            path = self._path(url, suffix)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+
+class HostRateLimiter:
+    """Spaces request starts to at most `rate` per second for each host"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def wait(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, host: str, seconds: float):
+        # Retry-After from one worker holds back every worker on that host
+        with self._lock:
+            self._next[host] = max(self._next.get(host, 0.0), time.monotonic() + seconds)
+
+
+def retry_after(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Crawler:
+    """Concurrent, polite HTTP fetcher.
+
+    One pooled session shared by `concurrency` worker threads, a per-host rate
+    limit, retries with exponential backoff (honouring Retry-After), and
+    conditional GETs against an optional on-disk cache so unchanged pages
+    come back as 304s instead of full downloads.
+    """
+
+    def __init__(self, concurrency: int = 8, rate_per_host: float = 4.0, timeout: float = 20,
+                 retries: int = 3, backoff: float = 0.5, cache_dir: str | None = None,
+                 user_agent: str = "shl-catalog-crawler/1.0"):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"downloaded": 0, "not_modified": 0, "retries": 0, "errors": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def fetch(self, url: str) -> FetchResult:
+        """GET `url`, raising requests exceptions once retries are exhausted"""
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            meta, _ = cached
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(host)
+            delay = self.backoff * 2 ** attempt * (1 + random.random())
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self._count("errors")
+                    raise
+            else:
+                if response.status_code == 304 and cached:
+                    self._count("not_modified")
+                    return FetchResult(url, 200, cached[1], from_cache=True)
+
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.retries:
+                    if not response.ok:
+                        self._count("errors")
+                    response.raise_for_status()
+                    if self.cache and ("ETag" in response.headers or "Last-Modified" in response.headers):
+                        self.cache.put(url, response.headers, response.content)
+                    self._count("downloaded")
+                    return FetchResult(url, response.status_code, response.content)
+
+                if (wait := retry_after(response)) is not None:
+                    delay = wait
+                    self.rate_limiter.pause(host, wait)
+
+            self._count("retries")
+            time.sleep(delay)
+
+    def fetch_all(self, urls: list) -> list:
+        """Fetch concurrently; returns a FetchResult or the raised exception per URL, in order"""
+        def fetch_or_error(url):
+            try:
+                return self.fetch(url)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(fetch_or_error, urls))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,33 @@
+from qdrant_client import QdrantClient
+from config import QDRANT_URL, QDRANT_API_KEY, VECTOR_INDEX_PATH
+from vector_index import VectorIndex
+
+#Intialize Qdrant client
+qdrant_client = QdrantClient(
+    url=QDRANT_URL,
+    api_key=QDRANT_API_KEY
+)
+
+def export_vector_index(path: str, collection_name: str = "rag_embeddings"):
+
+    # Scroll the whole collection with vectors
+    points = []
+    offset = None
+    while True:
+        batch, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            with_vectors=True,
+            with_payload=True,
+            limit=256,
+            offset=offset
+        )
+        points.extend(batch)
+        if offset is None:
+            break
+
+    index = VectorIndex.from_points(points)
+    index.save(path)
+    print(f"Exported {len(index)} vectors to {path}.npy")
+
+# Export the collection for RETRIEVAL_BACKEND=numpy
+export_vector_index(VECTOR_INDEX_PATH)
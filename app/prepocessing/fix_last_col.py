@@ -1,23 +1,7 @@
 import pandas as pd
+from catalog import expand_test_type
 
-# Mapping dictionary from the legend
-TEST_TYPE_MAPPING = {
-    'A': 'Ability & Aptitude',
-    'B': 'Biodata & Situational Judgement',
-    'C': 'Competencies',
-    'D': 'Development & 360',
-    'E': 'Assessment Exercises',
-    'K': 'Knowledge & Skills',
-    'P': 'Personality & Behavior',
-    'S': 'Simulations'
-}
-
-def expand_test_type(code_str):
-    """Convert letter codes to full names using the mapping"""
-    if pd.isna(code_str):
-        return ''
-    return ', '.join([TEST_TYPE_MAPPING.get(char, '') for char in str(code_str)])
-
+# crawl_pages.py now applies the expansion itself; this converts older letter-code exports
 # Read CSV file
 df = pd.read_csv('data/shl_product_details.csv')
 
@@ -1,63 +1,97 @@
-import requests
 from bs4 import BeautifulSoup
+import argparse
 import csv
+from config import CRAWL_CONCURRENCY, CRAWL_RATE_PER_HOST, CRAWL_TIMEOUT, CRAWL_RETRIES, CRAWL_CACHE_DIR
+from crawler import Crawler
 
-base_url = "https://www.shl.com"
-all_products = []
-
-# Function to scrape a single page
-def scrape_page(url):
-    print(f"Scraping {url}")
-    try:
-        # Get the HTML content
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find all product rows
-        rows = soup.select('tr[data-entity-id]')
-        
-        for row in rows:
-            # Extract name and URL from the link
-            link_element = row.select_one('td.custom_table-heading_title a')
-            if link_element:
-                name = link_element.text.strip()
-                product_url = base_url + link_element['href']
-                
-                # Find the IRT column and check for the green circle
-                # Look for the third column with custom__table-heading__general class
-                irt_cells = row.select('td.custom__table-heading__general')
-                has_irt = "No"
-                if len(irt_cells) >= 2:  # Based on the image, IRT appears to be the 2nd general column
-                    irt_cell = irt_cells[1]  # Index 1 is the second cell
-                    irt_element = irt_cell.select_one('span.catalogue__circle.-yes')
-                    has_irt = "Yes" if irt_element else "No"
-                
-                product = {
-                    "name": name,
-                    "url": product_url,
-                    "irt": has_irt
-                }
-                if product not in all_products:
-                    all_products.append(product)
-        
-        print(f"  Extracted {len(rows)} products")
-        return 0
-    except Exception as e:
-        print(f"  Error scraping page: {e}")
-        return 0
-        
-# Scrape Individual Test Solutions (type=1)
-total_pages_type1 = 32
-for page in range(total_pages_type1):
-    start = page * 12
-    url = f"https://www.shl.com/solutions/products/product-catalog/?start={start}&type=1"
-    scrape_page(url)
-   
-# Save results to CSV
-with open('shl_products.csv', 'w', newline='', encoding='utf-8') as f:
-    writer = csv.DictWriter(f, fieldnames=['name', 'url', 'irt'])
-    writer.writeheader()
-    writer.writerows(all_products)
-
-print(f"Scraping completed. Total products extracted: {len(all_products)}")
-print(f"Results saved to shl_products.csv")
+BASE_URL = "https://www.shl.com"
+TOTAL_PAGES_TYPE1 = 32
+PAGE_SIZE = 12
+
+def catalog_page_urls(base_url: str = BASE_URL, pages: int = TOTAL_PAGES_TYPE1) -> list:
+    # Individual Test Solutions (type=1), 12 products per page
+    return [
+        f"{base_url}/solutions/products/product-catalog/?start={page * PAGE_SIZE}&type=1"
+        for page in range(pages)
+    ]
+
+# Function to parse a single catalog page
+def parse_catalog_page(content: bytes, base_url: str = BASE_URL) -> list:
+    soup = BeautifulSoup(content, 'html.parser')
+    products = []
+
+    # Find all product rows
+    rows = soup.select('tr[data-entity-id]')
+
+    for row in rows:
+        # Extract name and URL from the link
+        link_element = row.select_one('td.custom_table-heading_title a')
+        if link_element:
+            name = link_element.text.strip()
+            product_url = base_url + link_element['href']
+
+            # Find the IRT column and check for the green circle
+            # Look for the third column with custom__table-heading__general class
+            irt_cells = row.select('td.custom__table-heading__general')
+            has_irt = "No"
+            if len(irt_cells) >= 2:  # Based on the image, IRT appears to be the 2nd general column
+                irt_cell = irt_cells[1]  # Index 1 is the second cell
+                irt_element = irt_cell.select_one('span.catalogue__circle.-yes')
+                has_irt = "Yes" if irt_element else "No"
+
+            products.append({
+                "name": name,
+                "url": product_url,
+                "irt": has_irt
+            })
+
+    return products
+
+def scrape_catalog(crawler: Crawler, base_url: str = BASE_URL, pages: int = TOTAL_PAGES_TYPE1) -> list:
+    urls = catalog_page_urls(base_url, pages)
+    all_products = []
+    seen = set()
+
+    # Pages are fetched concurrently but merged in page order
+    for url, result in zip(urls, crawler.fetch_all(urls)):
+        if isinstance(result, Exception):
+            print(f"  Error scraping {url}: {result}")
+            continue
+
+        products = parse_catalog_page(result.content, base_url)
+        for product in products:
+            if product["url"] not in seen:
+                seen.add(product["url"])
+                all_products.append(product)
+        print(f"Scraped {url}: {len(products)} products" + (" (not modified)" if result.from_cache else ""))
+
+    return all_products
+
+def save_products(products: list, path: str):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['name', 'url', 'irt'])
+        writer.writeheader()
+        writer.writerows(products)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect product URLs from the SHL catalog")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--pages", type=int, default=TOTAL_PAGES_TYPE1)
+    parser.add_argument("--output", default="app/prepocessing/data/shl_products.csv")
+    args = parser.parse_args()
+
+    crawler = Crawler(
+        concurrency=CRAWL_CONCURRENCY,
+        rate_per_host=CRAWL_RATE_PER_HOST,
+        timeout=CRAWL_TIMEOUT,
+        retries=CRAWL_RETRIES,
+        cache_dir=CRAWL_CACHE_DIR
+    )
+    all_products = scrape_catalog(crawler, args.base_url, args.pages)
+    crawler.close()
+
+    # Save results to CSV
+    save_products(all_products, args.output)
+
+    print(f"Scraping completed. Total products extracted: {len(all_products)} {crawler.stats}")
+    print(f"Results saved to {args.output}")
@@ -1,6 +1,16 @@
 from qdrant_client import QdrantClient, models
 import google.generativeai as genai
-from config import QDRANT_URL, QDRANT_API_KEY, GEMINI_API_KEY
+from google.api_core import exceptions as google_exceptions
+from config import QDRANT_URL, QDRANT_API_KEY, GEMINI_API_KEY, QDRANT_COLLECTION_PROFILE
+from collection_profiles import collection_config, collection_update
+from catalog import parse_duration, split_test_types, summarize_description
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import json
+import os
+import random
+import threading
+import time
 import uuid
 import pandas as pd
 
@@ -14,78 +24,248 @@ qdrant_client = QdrantClient(
 # Initialize embedding model here
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Errors worth retrying: quota / rate limits and transient server failures
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError
+)
+
+# Shared backoff so one rate-limited worker pauses all of them
+_backoff_lock = threading.Lock()
+_backoff_until = 0.0
+
 def initialize_vector_store():
-    
+
     try:
         if not qdrant_client.get_collections():
             raise ConnectionError("Failed to connect to Qdrant cluster")
-        
+
+        # Quantization, HNSW and on-disk settings come from QDRANT_COLLECTION_PROFILE
         if not qdrant_client.collection_exists("rag_embeddings"):
             qdrant_client.create_collection(
                 collection_name="rag_embeddings",
-                vectors_config=models.VectorParams(
-                    size=768,  # Dimension for embedding model
-                    distance=models.Distance.COSINE
-                )
+                **collection_config(QDRANT_COLLECTION_PROFILE, dim=768)  # Dimension for embedding model
             )
-            print("Vector store initialized successfully")
-        
+            print(f"Vector store initialized successfully ({QDRANT_COLLECTION_PROFILE} profile)")
+        else:
+            # No-op if unchanged; otherwise Qdrant rebuilds the index in the background
+            qdrant_client.update_collection(
+                collection_name="rag_embeddings",
+                **collection_update(QDRANT_COLLECTION_PROFILE)
+            )
+
+        # Indexes for the filters pushed into search
+        qdrant_client.create_payload_index(
+            collection_name="rag_embeddings",
+            field_name="duration",
+            field_schema=models.PayloadSchemaType.INTEGER
+        )
+        qdrant_client.create_payload_index(
+            collection_name="rag_embeddings",
+            field_name="test_type",
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+
     except Exception as e:
         print(f"Vector store initialization failed: {str(e)}")
         raise
-    
-def store_embeddings(csv_path: str, collection_name: str = "rag_embeddings"):
-    
-    # Read CSV data
+
+def build_embedding_text(row) -> str:
+    return \
+    f"""
+        Name: {row['Name']}
+        {row['Description']}
+        Duration: {row['Duration']} minutes
+        Test type: {row['Test Type']}
+    """
+
+def point_id(url: str) -> str:
+    # Stable across runs so re-indexing updates points instead of duplicating them
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, url.strip()))
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def build_payload(row) -> dict:
+    return {
+        "name": row["Name"],
+        "url": row["URL"],
+        "description": row["Description"],
+        "remote_testing": row["Remote Testing"],
+        "adaptive_support": row["Adaptive/IRT Support"],
+        "duration": parse_duration(row["Duration"].split("=")[-1]) if row["Duration"] else None,
+        "test_type": split_test_types(row["Test Type"]),
+        "summary": summarize_description(row["Description"]),  # Compact text for rerank prompts
+        "content_hash": content_hash(build_embedding_text(row))
+    }
+
+def fetch_indexed_payloads(collection_name: str) -> dict:
+    # Map point id -> payload for everything currently in the collection
+    payloads = {}
+    offset = None
+    while True:
+        batch, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            with_payload=True,
+            with_vectors=False,
+            limit=1000,
+            offset=offset
+        )
+        for point in batch:
+            payloads[str(point.id)] = point.payload or {}
+        if offset is None:
+            return payloads
+
+def embed_batch(texts: list, max_retries: int = 6) -> list:
+    global _backoff_until
+
+    for attempt in range(max_retries):
+        # Respect a pause requested by any worker
+        wait = _backoff_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        try:
+            return genai.embed_content(
+                model="models/text-embedding-004",
+                content=texts,
+                task_type="retrieval_query"
+            )['embedding']
+
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = min(60, 2 ** attempt) + random.uniform(0, 1)
+            with _backoff_lock:
+                _backoff_until = max(_backoff_until, time.monotonic() + delay)
+            print(f"  {type(e).__name__}, backing off {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return set(json.load(f))
+
+def save_checkpoint(path: str, done: set):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(done), f)
+    os.replace(tmp_path, path)
+
+def store_embeddings(
+    csv_path: str,
+    collection_name: str = "rag_embeddings",
+    batch_size: int = 50,
+    concurrency: int = 4,
+    upsert_chunk: int = 200,
+    incremental: bool = True
+):
+
+    # Read CSV data (one point per product URL)
     df = pd.read_csv(csv_path).fillna("")
-    
-    # Prepare points list
+    df = df.drop_duplicates(subset="URL", keep="last")
+    df["point_id"] = df["URL"].map(point_id)
+    df["content_hash"] = df.apply(lambda row: content_hash(build_embedding_text(row)), axis=1)
+
+    # Resume: skip rows upserted by a previous (failed) run
+    checkpoint_path = csv_path + ".checkpoint.json"
+    done = load_checkpoint(checkpoint_path)
+    pending = df[~df["URL"].isin(done)]
+    if done:
+        print(f"Resuming: {len(done)} rows already stored, {len(pending)} remaining")
+
+    if incremental:
+        indexed = fetch_indexed_payloads(collection_name)
+
+        # Only new rows or rows whose embedding text changed need embedding
+        indexed_hashes = pending["point_id"].map(lambda pid: indexed.get(pid, {}).get("content_hash"))
+        changed = indexed_hashes != pending["content_hash"]
+        print(f"Incremental: {changed.sum()} new or changed rows, {(~changed).sum()} unchanged")
+
+        # Same embedding text but a different payload (e.g. schema change): rewrite payload only
+        for _, row in pending[~changed].iterrows():
+            payload = build_payload(row)
+            if indexed[row["point_id"]] != payload:
+                qdrant_client.overwrite_payload(
+                    collection_name=collection_name,
+                    payload=payload,
+                    points=[row["point_id"]]
+                )
+
+        pending = pending[changed]
+
+        # Drop points for products that left the catalog
+        stale = sorted(set(indexed) - set(df["point_id"]))
+        if stale:
+            qdrant_client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=stale)
+            )
+            print(f"Deleted {len(stale)} points no longer in the catalog")
+
+    rows = [row for _, row in pending.iterrows()]
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
     points = []
-    
-    for _, row in df.iterrows():
-        # Generate embedding
-        embedding_text = \
-        f"""
-            Name: {row['Name']}
-            {row['Description']}
-            Duration: {row['Duration']} minutes
-            Test type: {row['Test Type']}
-        """
-        embedding = genai.embed_content(
-            model="models/text-embedding-004",
-            content=embedding_text,
-            task_type="retrieval_query"
-        )['embedding']
-        
-        # Create payload with data
-        payload = {
-            "name": row["Name"],
-            "url": row["URL"],
-            "description": row["Description"],
-            "remote_testing": row["Remote Testing"],
-            "adaptive_support": row["Adaptive/IRT Support"],
-            "duration": row["Duration"].split("=")[-1].strip() if row["Duration"] else "",
-            "test_type": row["Test Type"]
+    stored = 0
+    failed = 0
+
+    def flush():
+        nonlocal points, stored
+        for i in range(0, len(points), upsert_chunk):
+            chunk = points[i:i + upsert_chunk]
+            qdrant_client.upsert(collection_name=collection_name, points=chunk)
+            done.update(point.payload["url"] for point in chunk)
+            stored += len(chunk)
+        points = []
+        save_checkpoint(checkpoint_path, done)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(embed_batch, [build_embedding_text(row) for row in batch]): batch
+            for batch in batches
         }
-        
-        # Create Qdrant point
-        points.append(
-            models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
-                payload=payload
-        ))
-    
-    # Upsert to Qdrant
-    qdrant_client.upsert(
-        collection_name=collection_name,
-        points=points
-    )
-    print(f"Successfully upserted {len(points)} embeddings")
+
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                embeddings = future.result()
+            except Exception as e:
+                failed += len(batch)
+                print(f"  Batch of {len(batch)} rows failed: {str(e)}")
+                continue
+
+            # Create Qdrant points
+            points.extend(
+                models.PointStruct(
+                    id=row["point_id"],
+                    vector=embedding,
+                    payload=build_payload(row)
+                )
+                for row, embedding in zip(batch, embeddings)
+            )
+
+            # Stream upserts in chunks instead of one giant request
+            if len(points) >= upsert_chunk:
+                flush()
+            print(f"Progress: {stored + len(points) + failed}/{len(rows)} rows embedded ({failed} failed)")
+
+    if points:
+        flush()
+
+    if failed:
+        raise RuntimeError(f"{failed} rows failed to embed; re-run to resume from {checkpoint_path}")
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Successfully upserted {stored} embeddings")
 
 # Initialize vector store
 initialize_vector_store()
 
 # Store embeddings from CSV
 csv_path = "app/data/shl_product_details.csv"  # Path to your CSV file
-store_embeddings(csv_path)
\ No newline at end of file
+store_embeddings(csv_path)
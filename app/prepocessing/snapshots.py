@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+
+def read_snapshot(path: str) -> bytes:
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+class SnapshotStore:
+    """Raw HTML snapshots, gzip-compressed and keyed by URL and fetch time.
+
+    Layout is `<root>/<sha256(url)>/<fetched_at>.html.gz` with the URL in
+    `url.txt`, so extraction can be rerun over any snapshot offline.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32])
+
+    def versions(self, url: str) -> list:
+        """Snapshot paths for `url`, oldest first"""
+        directory = self._dir(url)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory)) if name.endswith(".html.gz")
+        ]
+
+    def latest(self, url: str) -> str | None:
+        versions = self.versions(url)
+        return versions[-1] if versions else None
+
+    def put(self, url: str, content: bytes, fetched_at: datetime | None = None) -> str:
+        """Store a snapshot; returns the existing path if the page is unchanged"""
+        if (latest := self.latest(url)) and read_snapshot(latest) == content:
+            return latest
+
+        directory = self._dir(url)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "url.txt"), "w", encoding="utf-8") as f:
+            f.write(url)
+
+        fetched_at = (fetched_at or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        path = os.path.join(directory, f"{fetched_at.strftime(TIMESTAMP_FORMAT)}.html.gz")
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(content)
+        os.replace(tmp, path)
+        return path
+
+    def urls(self) -> list:
+        urls = []
+        for name in sorted(os.listdir(self.root)):
+            try:
+                with open(os.path.join(self.root, name, "url.txt"), encoding="utf-8") as f:
+                    urls.append(f.read().strip())
+            except OSError:
+                continue
+        return urls
@@ -0,0 +1,54 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread (by default the caller's) at a fixed interval.
+
+    Cheap enough to switch on for a single request. On an async worker the
+    event loop thread is shared, so concurrent requests show up in the samples too.
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.elapsed = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[" <- ".join(stack[:8])] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    def report(self, top: int = 15) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "samples": sum(self.samples.values()),
+            "top_stacks": [
+                {"stack": stack, "samples": n} for stack, n in self.samples.most_common(top)
+            ]
+        }
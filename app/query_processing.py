@@ -0,0 +1,94 @@
+import re
+from collections import Counter
+import numpy as np
+from config import QUERY_CHUNK_WORDS, QUERY_MAX_CHUNKS, RERANK_QUERY_WORDS
+from local_rerank import tokenize
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(str(text or "")) if s.strip()]
+
+
+def split_query(text: str, max_words: int = QUERY_CHUNK_WORDS,
+                max_chunks: int = QUERY_MAX_CHUNKS) -> list:
+    """Short queries as-is; long ones (e.g. a pasted JD) as sentence-aligned chunks.
+
+    Only the first `max_chunks` chunks are kept: the opening carries the
+    user's request and the role, the tail is usually company boilerplate.
+    """
+    if len(text.split()) <= max_words:
+        return [text]
+
+    chunks, current = [], []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            piece = words[start:start + max_words]
+            if current and len(current) + len(piece) > max_words:
+                chunks.append(" ".join(current))
+                current = []
+            current += piece
+    if current:
+        chunks.append(" ".join(current))
+    return chunks[:max_chunks]
+
+
+def summarize_query(text: str, max_words: int = RERANK_QUERY_WORDS) -> str:
+    """Extractive summary of a long query for the rerank prompt.
+
+    Keeps the opening sentence, then the sentences richest in terms that
+    recur across the text (the skills a JD keeps coming back to), in their
+    original order, within `max_words`.
+    """
+    if len(text.split()) <= max_words:
+        return text
+
+    sentences = split_sentences(text)
+    tokens = [tokenize(s) for s in sentences]
+    recurrence = Counter(t for sentence_tokens in tokens for t in sentence_tokens)
+    scores = [
+        sum(recurrence[t] - 1 for t in sentence_tokens) / len(sentence.split()) ** 0.5
+        for sentence, sentence_tokens in zip(sentences, tokens)
+    ]
+
+    chosen, used = {0}, len(sentences[0].split())
+    for i in sorted(range(1, len(sentences)), key=lambda i: -scores[i]):
+        words = len(sentences[i].split())
+        if used + words <= max_words:
+            chosen.add(i)
+            used += words
+
+    summary = " ".join(sentences[i] for i in sorted(chosen))
+    return " ".join(summary.split()[:max_words])
+
+
+def pool_embeddings(embeddings: list) -> np.ndarray:
+    """Normalised mean of the chunk embeddings, one vector for the whole query"""
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    pooled = (matrix / np.where(norms > 0, norms, 1)).mean(axis=0)
+    norm = np.linalg.norm(pooled)
+    return pooled / norm if norm > 0 else pooled
+
+
+def reciprocal_rank_fusion(result_lists: list, k: int = 60) -> list:
+    """Fuse ranked candidate lists by the sum of 1 / (k + rank), keyed on URL.
+
+    A URL counts once per list, at its best rank, and each fused candidate
+    keeps its best similarity score. A single list comes back in its
+    original order.
+    """
+    fused, scores = {}, {}
+    for results in result_lists:
+        seen = set()
+        for rank, candidate in enumerate(results, start=1):
+            url = candidate["url"]
+            if url in seen:
+                continue
+            seen.add(url)
+            scores[url] = scores.get(url, 0.0) + 1 / (k + rank)
+            if url not in fused or candidate.get("score", 0) > fused[url].get("score", 0):
+                fused[url] = candidate
+    return [fused[url] for url in sorted(scores, key=scores.get, reverse=True)]
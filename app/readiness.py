@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+
+class DependencyMonitor:
+    """Runs dependency checks and caches the outcome for `ttl` seconds.
+
+    `checks` maps a name to (async check function, required). A check returns
+    a dict of details or raises. The service is ready when every required
+    check passed; optional ones only mark it degraded.
+    """
+
+    def __init__(self, checks: dict, ttl: float = 30, timeout: float = 10):
+        self.checks = checks
+        self.ttl = ttl
+        self.timeout = timeout
+        self._state = None
+        self._checked_at = None
+        self._lock = asyncio.Lock()
+
+    async def _run(self, check) -> dict:
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check(), self.timeout)
+            result = {"ok": True, **(details or {})}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def refresh(self, max_age: float = 0) -> dict:
+        async with self._lock:
+            # Callers queued behind a refresh reuse its result
+            if self._state is not None and time.monotonic() - self._checked_at <= max_age:
+                return self._state
+
+            names = list(self.checks)
+            results = await asyncio.gather(*[self._run(self.checks[name][0]) for name in names])
+            dependencies = dict(zip(names, results))
+            self._state = {
+                "ready": all(dependencies[name]["ok"] for name in names if self.checks[name][1]),
+                "degraded": not all(result["ok"] for result in results),
+                "dependencies": dependencies
+            }
+            self._checked_at = time.monotonic()
+            return self._state
+
+    async def state(self) -> dict:
+        # Probes hit this often; only re-check once the last result is stale
+        return await self.refresh(max_age=self.ttl)
@@ -0,0 +1,43 @@
+from config import RERANK_SCORE_CUTOFF, RERANK_MIN_CANDIDATES, RERANK_SKIP_MARGIN, RERANK_SKIP_DEPTH
+
+
+def is_well_separated(candidates: list, depth: int = RERANK_SKIP_DEPTH,
+                      margin: float = RERANK_SKIP_MARGIN) -> bool:
+    """True when each of the top `depth` scores beats the next by at least `margin` cosine.
+
+    Scores are compared best first: a fused multi-chunk list is in RRF
+    order, which need not follow similarity.
+    """
+    scores = [c.get("score") for c in candidates]
+    if depth <= 0 or len(scores) <= depth or None in scores:
+        return False
+    scores = sorted(scores, reverse=True)
+    return all(scores[i] - scores[i + 1] >= margin for i in range(depth))
+
+
+def plan_rerank(candidates: list, cutoff: float = RERANK_SCORE_CUTOFF,
+                min_size: int = RERANK_MIN_CANDIDATES) -> tuple[list, str]:
+    """Returns (rerank_set, path), path being full, pruned or skipped.
+
+    skipped: the similarity order is already decisive, or there are fewer
+    than two candidates, so no LLM call is needed; the set comes back in
+    that order.
+    pruned: candidates scoring below `cutoff` times the best are left out
+    of the prompt, keeping at least the first `min_size` in retrieval order.
+    """
+    if len(candidates) <= 1:
+        return candidates, "skipped"
+
+    scores = [c.get("score") for c in candidates]
+    if None in scores:
+        return candidates, "full"
+
+    if is_well_separated(candidates):
+        return sorted(candidates, key=lambda c: c["score"], reverse=True), "skipped"
+
+    floor = max(scores) * cutoff
+    keep = [i for i, score in enumerate(scores) if score >= floor]
+    keep = sorted(set(keep) | set(range(min(min_size, len(candidates)))))
+    if len(keep) == len(candidates):
+        return candidates, "full"
+    return [candidates[i] for i in keep], "pruned"
@@ -1,38 +1,292 @@
-from qdrant_client import QdrantClient
-import google.generativeai as genai
-from config import QDRANT_URL, QDRANT_API_KEY, GEMINI_API_KEY
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+from config import (
+    QDRANT_URL, QDRANT_API_KEY, GEMINI_API_KEY, RETRIEVAL_BACKEND, VECTOR_INDEX_PATH,
+    EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL, EMBEDDING_CACHE_PATH,
+    EMBED_CONCURRENCY, SEARCH_CONCURRENCY, QDRANT_COLLECTION_PROFILE
+)
+from vector_index import VectorIndex
+from embedding_cache import EmbeddingCache, cache_key
+from collection_profiles import search_params
+from query_processing import split_query, reciprocal_rank_fusion
+from metrics import count, stage
+
+if TYPE_CHECKING:
+    from qdrant_client import models
 
-# Initialize Gemini client
-genai.configure(api_key=GEMINI_API_KEY)
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_LIMIT = 100  # Max texts per batch embedding request
 
-#Intialize Qdrant client
-qdrant_client = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY
+# Provider SDKs and clients are created on first use (or by the startup warmup)
+# so the server can bind its port without importing them
+genai = None
+qdrant_client = None
+async_qdrant_client = None
+vector_index = None
+_init_lock = threading.Lock()
+
+# Query embedding cache
+embedding_cache = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_SIZE,
+    ttl=EMBEDDING_CACHE_TTL,
+    path=EMBEDDING_CACHE_PATH
 )
 
-def retrieve_from_qdrant(query: str, top_k: int = 30):
-    
-    if not qdrant_client:
+# Bound in-flight provider calls per worker
+embed_semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+search_semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+def get_genai():
+    global genai
+    with _init_lock:
+        if genai is None:
+            import google.generativeai
+            google.generativeai.configure(api_key=GEMINI_API_KEY)
+            genai = google.generativeai
+    return genai
+
+def get_qdrant_client():
+    global qdrant_client
+    with _init_lock:
+        if qdrant_client is None and RETRIEVAL_BACKEND == "qdrant":
+            from qdrant_client import QdrantClient
+            qdrant_client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    return qdrant_client
+
+def get_async_qdrant_client():
+    global async_qdrant_client
+    with _init_lock:
+        if async_qdrant_client is None and RETRIEVAL_BACKEND == "qdrant":
+            from qdrant_client import AsyncQdrantClient
+            async_qdrant_client = AsyncQdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    return async_qdrant_client
+
+def get_vector_index() -> VectorIndex | None:
+    global vector_index
+    with _init_lock:
+        if vector_index is None and RETRIEVAL_BACKEND == "numpy":
+            vector_index = VectorIndex.load(VECTOR_INDEX_PATH)
+    return vector_index
+
+# Async paths go through these: the first call imports the SDK or maps the index in a
+# worker thread (about 0.5s each), so the event loop keeps serving /health meanwhile
+async def load_genai():
+    return genai if genai is not None else await asyncio.to_thread(get_genai)
+
+async def load_async_qdrant_client():
+    if async_qdrant_client is not None or RETRIEVAL_BACKEND != "qdrant":
+        return async_qdrant_client
+    return await asyncio.to_thread(get_async_qdrant_client)
+
+async def load_vector_index() -> VectorIndex | None:
+    if vector_index is not None or RETRIEVAL_BACKEND != "numpy":
+        return vector_index
+    return await asyncio.to_thread(get_vector_index)
+
+def embed_query(query: str, task_type: str = "retrieval_query") -> list:
+
+    key = cache_key(query, EMBEDDING_MODEL, task_type)
+    if (embedding := embedding_cache.get(key)) is not None:
+        return embedding
+
+    embedding = get_genai().embed_content(
+        model=EMBEDDING_MODEL,
+        content=query,
+        task_type=task_type
+    )['embedding']  # Use singular key
+
+    embedding_cache.put(key, embedding)
+    return embedding
+
+def build_qdrant_filter(filters: dict | None) -> "models.Filter | None":
+
+    if not filters:
+        return None
+
+    from qdrant_client import models
+
+    conditions = []
+    for key, value in filters.items():
+        if value is None or value == []:
+            continue
+        if key == "max_duration":
+            conditions.append(models.FieldCondition(key="duration", range=models.Range(lte=value)))
+        elif key == "test_type":
+            conditions.append(models.FieldCondition(key="test_type", match=models.MatchAny(any=list(value))))
+        else:
+            conditions.append(models.FieldCondition(key=key, match=models.MatchValue(value=value)))
+
+    return models.Filter(must=conditions) if conditions else None
+
+async def embed_queries_async(queries: list, task_type: str = "retrieval_query") -> list:
+
+    keys = [cache_key(query, EMBEDDING_MODEL, task_type) for query in queries]
+    embeddings = await embedding_cache.get_many_async(keys)
+
+    # Embed all cache misses with batched requests
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    for start in range(0, len(missing), EMBED_BATCH_LIMIT):
+        chunk = missing[start:start + EMBED_BATCH_LIMIT]
+        genai_module = await load_genai()
+        with stage("embed"):
+            async with embed_semaphore:
+                response = await genai_module.embed_content_async(
+                    model=EMBEDDING_MODEL,
+                    content=[queries[i] for i in chunk],
+                    task_type=task_type
+                )
+        for i, embedding in zip(chunk, response['embedding']):
+            embeddings[i] = embedding
+        # One disk transaction per provider batch
+        await embedding_cache.put_many_async([(keys[i], embeddings[i]) for i in chunk])
+
+    return embeddings
+
+def search_vectors(query_embedding, top_k: int, filters: dict | None = None):
+
+    if RETRIEVAL_BACKEND == "numpy":
+        return get_vector_index().search(query_embedding, top_k=top_k, filters=filters)
+
+    if not (client := get_qdrant_client()):
         raise RuntimeError("Qdrant client not initialized")
-    
+
+    return client.search(
+        collection_name="rag_embeddings",
+        query_vector=query_embedding,
+        query_filter=build_qdrant_filter(filters),
+        search_params=search_params(QDRANT_COLLECTION_PROFILE),
+        limit=top_k
+    )
+
+async def search_vectors_async(query_embedding, top_k: int, filters: dict | None = None):
+
+    with stage("search"):
+        # In-process search is a single matrix product, no need to leave the loop
+        if RETRIEVAL_BACKEND == "numpy":
+            return (await load_vector_index()).search(query_embedding, top_k=top_k, filters=filters)
+
+        if not (client := await load_async_qdrant_client()):
+            raise RuntimeError("Qdrant client not initialized")
+
+        async with search_semaphore:
+            return await client.search(
+                collection_name="rag_embeddings",
+                query_vector=query_embedding,
+                query_filter=build_qdrant_filter(filters),
+                search_params=search_params(QDRANT_COLLECTION_PROFILE),
+                limit=top_k
+            )
+
+async def search_batch_async(query_embeddings: list, top_k: int, filters_list: list | None = None):
+
+    filters_list = filters_list or [None] * len(query_embeddings)
+
+    with stage("search"):
+        if RETRIEVAL_BACKEND == "numpy":
+            return (await load_vector_index()).search_batch(query_embeddings, top_k=top_k, filters_list=filters_list)
+
+        if not (client := await load_async_qdrant_client()):
+            raise RuntimeError("Qdrant client not initialized")
+
+        from qdrant_client import models
+
+        # One round trip for all queries
+        async with search_semaphore:
+            return await client.search_batch(
+                collection_name="rag_embeddings",
+                requests=[
+                    models.SearchRequest(
+                        vector=embedding,
+                        filter=build_qdrant_filter(filters),
+                        params=search_params(QDRANT_COLLECTION_PROFILE),
+                        limit=top_k,
+                        with_payload=True
+                    )
+                    for embedding, filters in zip(query_embeddings, filters_list)
+                ]
+            )
+
+def retrieve_from_qdrant(query: str, top_k: int = 30, filters: dict | None = None):
+
     try:
-        # Single embedding
-        query_embedding = genai.embed_content(
-            model="models/text-embedding-004",
-            content=query,
-            task_type="retrieval_query"
-        )['embedding']  # Use singular key
-        
-        # Perform search
-        results = qdrant_client.search(
-            collection_name="rag_embeddings",
-            query_vector=query_embedding,
-            limit=top_k
-        )
-        
-        return [hit.payload for hit in results]
-    
+        # Single embedding (cached)
+        query_embedding = embed_query(query)
+
+        # Perform filtered search
+        results = search_vectors(query_embedding, top_k, filters)
+
+        # Keep the similarity score for downstream ranking
+        return [{**hit.payload, "score": hit.score} for hit in results]
+
     except Exception as e:
         print(f"Retrieval failed: {str(e)}")
-        return []
\ No newline at end of file
+        count("retrieval_error")
+        return []
+
+def fuse_chunk_hits(results: list, top_k: int) -> list:
+    # Per-chunk search hits of one query -> one candidate list, keeping the similarity score
+    fused = reciprocal_rank_fusion(
+        [[{**hit.payload, "score": hit.score} for hit in hits] for hits in results]
+    )
+    return fused[:top_k]
+
+async def retrieve_embedded_async(query_embeddings: list, top_k: int = 30, filters: dict | None = None) -> list:
+    """Candidates for one query embedded as one or more chunks, per-chunk results fused by rank"""
+
+    try:
+        if len(query_embeddings) == 1:
+            results = [await search_vectors_async(query_embeddings[0], top_k, filters)]
+        else:
+            results = await search_batch_async(query_embeddings, top_k, [filters] * len(query_embeddings))
+
+        return fuse_chunk_hits(results, top_k)
+
+    except Exception as e:
+        print(f"Retrieval failed: {str(e)}")
+        count("retrieval_error")
+        return []
+
+async def retrieve_batch_async(queries: list, top_k: int = 30, filters_list: list | None = None) -> list:
+
+    # Errors propagate: the caller reports them per batch
+    filters_list = filters_list or [None] * len(queries)
+
+    # Long queries are chunked as on /recommend; every chunk goes into the one
+    # embedding call and the one multi-search, then is fused back per query
+    chunk_lists = [split_query(query) for query in queries]
+    chunks = [chunk for chunk_list in chunk_lists for chunk in chunk_list]
+    chunk_filters = [
+        filters for chunk_list, filters in zip(chunk_lists, filters_list) for _ in chunk_list
+    ]
+
+    query_embeddings = await embed_queries_async(chunks)
+    results = await search_batch_async(query_embeddings, top_k, chunk_filters)
+
+    candidates, start = [], 0
+    for chunk_list in chunk_lists:
+        candidates.append(fuse_chunk_hits(results[start:start + len(chunk_list)], top_k))
+        start += len(chunk_list)
+    return candidates
+
+async def check_embedding() -> dict:
+    # Uncached on purpose: this is what opens the provider connection
+    genai_module = await load_genai()
+    response = await genai_module.embed_content_async(
+        model=EMBEDDING_MODEL,
+        content="warmup",
+        task_type="retrieval_query"
+    )
+    return {"dimensions": len(response['embedding'])}
+
+async def check_vector_store() -> dict:
+
+    if RETRIEVAL_BACKEND == "numpy":
+        index = await load_vector_index()
+        # Touch every row so the memory-mapped matrix is paged in
+        await asyncio.to_thread(index.matrix.sum)
+        return {"backend": "numpy", "points": len(index)}
+
+    client = await load_async_qdrant_client()
+    info = await client.get_collection("rag_embeddings")
+    return {"backend": "qdrant", "points": info.points_count}
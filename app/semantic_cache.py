@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class SemanticCache:
+    """LRU result cache looked up by embedding similarity instead of exact key.
+
+    A lookup hits when a live entry with the same `scope` (e.g. the request
+    filters) has cosine similarity >= `threshold` to the query embedding.
+    Embeddings sit in one preallocated float32 matrix, so a lookup is a
+    single matrix-vector product over at most `max_size` rows.
+    """
+
+    def __init__(self, max_size: int = 1024, threshold: float = 0.95, ttl: float | None = 3600):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self._matrix = None  # (max_size, dim), allocated on first put
+        self._scopes = [None] * max_size
+        self._entries = OrderedDict()  # slot -> (value, created_at), in LRU order
+        self._free = list(range(max_size - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _release(self, slot: int):
+        del self._entries[slot]
+        self._scopes[slot] = None
+        self._free.append(slot)
+
+    def _best_match(self, vector: np.ndarray, scope) -> tuple[int | None, float]:
+        slots = [slot for slot in self._entries if self._scopes[slot] == scope]
+        if not slots or self._matrix is None or self._matrix.shape[1] != len(vector):
+            return None, 0.0
+        similarities = self._matrix[slots] @ vector
+        best = int(np.argmax(similarities))
+        return slots[best], float(similarities[best])
+
+    def get(self, embedding, scope=None, default=None):
+        vector = self._normalize(embedding)
+        with self._lock:
+            while True:
+                slot, similarity = self._best_match(vector, scope)
+                if slot is None or similarity < self.threshold:
+                    self.misses += 1
+                    return default
+
+                value, created_at = self._entries[slot]
+                if self.ttl is not None and time.time() - created_at > self.ttl:
+                    # Drop the stale entry and look again
+                    self._release(slot)
+                    self.expirations += 1
+                    continue
+
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return value
+
+    def put(self, embedding, value, scope=None):
+        if self.max_size <= 0:
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+
+            # A near-identical query replaces its entry instead of taking a second slot
+            slot, similarity = self._best_match(vector, scope)
+            if slot is not None and similarity >= 0.999:
+                self._release(slot)
+            elif not self._free:
+                self._release(next(iter(self._entries)))
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._scopes[slot] = scope
+            self._entries[slot] = (value, time.time())
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._entries):
+                self._release(slot)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,44 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls with the same key into one shared task.
+
+    Callers arriving while a call is in flight await its result instead of
+    starting their own. A caller that times out or is cancelled only stops
+    waiting: the shared task keeps running for the others, and is cancelled
+    only once nobody is waiting. Nothing is kept after the task finishes, so
+    a failure is never served to later callers.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> [task, waiters]
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    def _forget(self, key, task):
+        if (call := self._calls.get(key)) is not None and call[0] is task:
+            del self._calls[key]
+
+    async def do(self, key, make_call, timeout: float | None = None) -> tuple:
+        """Returns (result, shared). `timeout` bounds the wait of callers that join an existing call"""
+        call = self._calls.get(key)
+        shared = call is not None
+        if not shared:
+            task = asyncio.ensure_future(make_call())
+            task.add_done_callback(lambda _: self._forget(key, task))
+            call = self._calls[key] = [task, 0]
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout if shared else None), shared
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                task.cancel()
+                self._forget(key, task)
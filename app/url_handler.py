@@ -1,41 +1,140 @@
 import re
+import time
+import asyncio
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from cache import TTLCache
+from config import (
+    JD_CONNECT_TIMEOUT, JD_READ_TIMEOUT, JD_FETCH_DEADLINE, JD_MAX_BYTES,
+    JD_CACHE_SIZE, JD_CACHE_TTL
+)
+
+URL_PATTERN = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/?=\w&%-]*')
+
+# Set headers to mimic a real browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = {"trk", "trackingid", "refid", "ref", "originalsubdomain", "lipi", "src"}
+
+# Only the job description container is parsed
+DESCRIPTION_STRAINER = SoupStrainer('div', {'class': 'description__text description__text--rich'})
+
+# Shared pooled session for get_job; async callers get their own client lazily
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.headers.update(HEADERS)
+async_client = None
+
+# Extracted JD text, keyed on canonical URL
+job_cache = TTLCache(max_size=JD_CACHE_SIZE, ttl=JD_CACHE_TTL)
 
 # URL validation functions
 def is_url(input_str):
-    url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/?=\w&%-]*'
-    return re.search(url_pattern, input_str) is not None
+    return URL_PATTERN.search(input_str) is not None
 
 def extract_url(input_str):
-    url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/?=\w&%-]*'
-    match = re.search(url_pattern, input_str)
+    match = URL_PATTERN.search(input_str)
     return match.group(0) if match else None
 
+def canonicalize_url(url: str) -> str:
+    # Same posting shared from different places maps to one cache entry
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def extract_description(html: bytes) -> str:
+    soup = BeautifulSoup(html, 'html.parser', parse_only=DESCRIPTION_STRAINER)
+
+    # Find the job description container
+    description_section = soup.find('div', {'class': 'description__text description__text--rich'})
+    if description_section is None:
+        raise ValueError("No job description found on the page")
+
+    # Clean and format the text
+    cleaned_lines = [line.strip() for line in description_section.get_text(separator='\n').split('\n') if line.strip()]
+
+    return '\n'.join(cleaned_lines)
+
+def check_content_length(headers):
+    if int(headers.get("Content-Length") or 0) > JD_MAX_BYTES:
+        raise ValueError(f"Page is larger than {JD_MAX_BYTES} bytes")
+
+def append_chunk(body: bytearray, chunk: bytes, deadline: float):
+    # Bounded read: cap the size and the total time, not just the gap between chunks
+    body.extend(chunk)
+    if len(body) > JD_MAX_BYTES:
+        raise ValueError(f"Page is larger than {JD_MAX_BYTES} bytes")
+    if time.monotonic() > deadline:
+        raise TimeoutError(f"Page took longer than {JD_FETCH_DEADLINE}s to download")
 
 # Job description extraction function
 def get_job(url):
+    key = canonicalize_url(url)
+    if (cached := job_cache.get(key)) is not None:
+        return cached
+
     try:
-        # Set headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
+        deadline = time.monotonic() + JD_FETCH_DEADLINE
+        body = bytearray()
+
         # Fetch webpage
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Create BeautifulSoup object
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the job description container
-        description_section = soup.find('div', {'class': 'description__text description__text--rich'})
-            
-        # Clean and format the text
-        cleaned_lines = [line.strip() for line in description_section.get_text(separator='\n').split('\n') if line.strip()]
-        
-        return '\n'.join(cleaned_lines)
+        with session.get(url, timeout=(JD_CONNECT_TIMEOUT, JD_READ_TIMEOUT), stream=True) as response:
+            response.raise_for_status()
+            check_content_length(response.headers)
+            # read1 returns whatever has arrived, so the deadline is checked even on a trickle
+            while chunk := response.raw.read1(65536, decode_content=True):
+                append_chunk(body, chunk, deadline)
+
+        description = extract_description(bytes(body))
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to process LinkedIn job post: {str(e) or type(e).__name__}")
+
+    job_cache.put(key, description)
+    return description
+
+async def get_job_async(url):
+    """Async get_job for the API: shares the cache and parses off the event loop"""
+    global async_client
 
+    key = canonicalize_url(url)
+    if (cached := job_cache.get(key)) is not None:
+        return cached
+
+    if async_client is None:
+        async_client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(JD_READ_TIMEOUT, connect=JD_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=16)
+        )
+
+    try:
+        deadline = time.monotonic() + JD_FETCH_DEADLINE
+        body = bytearray()
+
+        async with asyncio.timeout(JD_FETCH_DEADLINE):
+            async with async_client.stream("GET", url) as response:
+                response.raise_for_status()
+                check_content_length(response.headers)
+                async for chunk in response.aiter_bytes(65536):
+                    append_chunk(body, chunk, deadline)
+
+        description = await asyncio.to_thread(extract_description, bytes(body))
 
     except Exception as e:
-        raise RuntimeError(f"Failed to process LinkedIn job post: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to process LinkedIn job post: {str(e) or type(e).__name__}")
+
+    job_cache.put(key, description)
+    return description
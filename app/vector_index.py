@@ -0,0 +1,148 @@
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+from catalog import parse_duration, split_test_types
+
+EMBEDDING_DIM = 768
+
+# Payload fields with a small set of values get one precomputed mask per value
+KEYWORD_FIELDS = ("remote_testing", "adaptive_support")
+
+
+@dataclass
+class ScoredHit:
+    """Search hit with the same shape as Qdrant's ScoredPoint"""
+    id: str
+    score: float
+    payload: dict
+
+
+class VectorIndex:
+    """In-process cosine index over the catalog embeddings.
+
+    Vectors are L2-normalised once at build time and kept in a contiguous
+    float32 matrix, so a query is a single matrix-vector product.
+    """
+
+    def __init__(self, ids: list, vectors: np.ndarray, payloads: list):
+        if len(ids) != len(vectors) or len(ids) != len(payloads):
+            raise ValueError("ids, vectors and payloads must have the same length")
+
+        self.ids = list(ids)
+        self.payloads = list(payloads)
+        self.matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._build_masks()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_points(cls, points):
+        """Build from Qdrant records (anything with id, vector and payload)"""
+        ids, vectors, payloads = [], [], []
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(point.vector)
+            payloads.append(point.payload or {})
+
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return cls(ids, matrix / norms, payloads)
+
+    def save(self, path: str):
+        """Write `<path>.npy` (vectors) and `<path>.json` (ids and payloads)"""
+        np.save(f"{path}.npy", self.matrix)
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "payloads": self.payloads}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a saved index, memory-mapping the vector matrix"""
+        matrix = np.load(f"{path}.npy", mmap_mode="r")
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(meta["ids"], matrix, meta["payloads"])
+
+    def _build_masks(self):
+        n = len(self.payloads)
+
+        # Unknown durations are -1 and never pass a max_duration filter
+        self.durations = np.array(
+            [-1 if (d := parse_duration(p.get("duration"))) is None else d for p in self.payloads], dtype=np.int32
+        )
+
+        self.masks = {}
+        for field in KEYWORD_FIELDS:
+            for i, payload in enumerate(self.payloads):
+                value = str(payload.get(field, ""))
+                self.masks.setdefault((field, value), np.zeros(n, dtype=bool))[i] = True
+
+        for i, payload in enumerate(self.payloads):
+            for test_type in split_test_types(payload.get("test_type")):
+                self.masks.setdefault(("test_type", test_type), np.zeros(n, dtype=bool))[i] = True
+
+        self._duration_mask = lru_cache(maxsize=128)(self._make_duration_mask)
+
+    def _make_duration_mask(self, max_duration: int) -> np.ndarray:
+        return (self.durations >= 0) & (self.durations <= max_duration)
+
+    def filter_mask(self, filters: dict | None) -> np.ndarray | None:
+        """Combine the precomputed masks for `filters`.
+
+        Supported keys: `max_duration` (int), `test_type` (str or list, any
+        of), and any field in KEYWORD_FIELDS (exact value).
+        """
+        if not filters:
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+        empty = np.zeros(len(self), dtype=bool)
+        for key, value in filters.items():
+            if value is None or value == []:
+                continue
+            if key == "max_duration":
+                mask &= self._duration_mask(int(value))
+            elif key == "test_type":
+                any_of = empty.copy()
+                for test_type in split_test_types(value):
+                    any_of |= self.masks.get(("test_type", test_type), empty)
+                mask &= any_of
+            elif key in KEYWORD_FIELDS:
+                mask &= self.masks.get((key, str(value)), empty)
+            else:
+                raise ValueError(f"Unsupported filter field: {key}")
+        return mask
+
+    def search(self, query_vector, top_k: int = 10, filters: dict | None = None) -> list:
+        return self.search_batch([query_vector], top_k, [filters])[0]
+
+    def search_batch(self, query_vectors, top_k: int = 10, filters_list: list | None = None) -> list:
+        """Search several queries with one matrix-matrix product"""
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        all_scores = (queries / norms) @ self.matrix.T
+        filters_list = filters_list or [None] * len(queries)
+
+        return [
+            self._top_k(scores, top_k, self.filter_mask(filters))
+            for scores, filters in zip(all_scores, filters_list)
+        ]
+
+    def _top_k(self, scores: np.ndarray, top_k: int, mask: np.ndarray | None) -> list:
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            top_k = min(top_k, int(mask.sum()))
+
+        top_k = min(top_k, len(scores))
+        if top_k <= 0:
+            return []
+
+        # O(n) partition for the top k, then sort only those
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+
+        return [ScoredHit(self.ids[i], float(scores[i]), self.payloads[i]) for i in top]
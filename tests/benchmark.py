@@ -0,0 +1,233 @@
+"""Offline benchmark of the recommendation pipeline stages.
+
+Runs without network access: embeddings come from a deterministic hashing
+stand-in, Qdrant runs in-process (`:memory:`) next to the numpy index, and
+the LLM is a stub client. Reports per-stage latency percentiles plus
+recall@10 / MAP@10 on tests/data/labeled_queries.json and writes them as JSON.
+
+    python tests/benchmark.py --iterations 50 --output bench_results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+# Placeholder credentials so provider clients can be constructed offline
+os.environ.setdefault("GEMINI_API_KEY", "offline")
+os.environ.setdefault("GROQ_API_KEY", "offline")
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ["RETRIEVAL_BACKEND"] = "qdrant"  # The numpy index is built from fixtures below
+
+import google.generativeai as genai
+from qdrant_client import QdrantClient, models
+
+import retrieval
+import generation_api
+from catalog import parse_duration, split_test_types, summarize_description
+from embedding_cache import EmbeddingCache
+from local_rerank import local_rerank
+from vector_index import VectorIndex, EMBEDDING_DIM
+
+CATALOG_PATH = os.path.join(ROOT, "app", "data", "shl_product_details.csv")
+QUERIES_PATH = os.path.join(ROOT, "tests", "data", "labeled_queries.json")
+
+
+def fake_embedding(text: str) -> list:
+    """Deterministic signed feature-hashing embedding of the words in `text`"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for word in text.lower().split():
+        digest = int(hashlib.md5(word.strip(".,:;()").encode("utf-8")).hexdigest(), 16)
+        vector[digest % EMBEDDING_DIM] += 1.0 if (digest >> 64) & 1 else -1.0
+    return vector.tolist()
+
+
+def fake_embed_content(model, content, task_type=None, **kwargs):
+    if isinstance(content, list):
+        return {"embedding": [fake_embedding(text) for text in content]}
+    return {"embedding": fake_embedding(content)}
+
+
+async def fake_embed_content_async(**kwargs):
+    return fake_embed_content(**kwargs)
+
+
+class StubCompletions:
+    """Returns the candidate IDs in prompt order, like an LLM that agrees with retrieval"""
+
+    async def create(self, model, messages, temperature=0.3, **kwargs):
+        count = messages[-1]["content"].count("\n[")
+        content = ",".join(str(i) for i in range(1, min(count, 10) + 1))
+        usage = SimpleNamespace(prompt_tokens=len(messages[-1]["content"]) // 4, completion_tokens=len(content) // 2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def load_points() -> list:
+    df = pd.read_csv(CATALOG_PATH).fillna("").drop_duplicates(subset="URL", keep="last")
+    points = []
+    for i, (_, row) in enumerate(df.iterrows()):
+        payload = {
+            "name": row["Name"],
+            "url": row["URL"],
+            "description": row["Description"],
+            "remote_testing": row["Remote Testing"],
+            "adaptive_support": row["Adaptive/IRT Support"],
+            "duration": parse_duration(row["Duration"].split("=")[-1]) if row["Duration"] else None,
+            "test_type": split_test_types(row["Test Type"]),
+            "summary": summarize_description(row["Description"])
+        }
+        vector = fake_embedding(f"{row['Name']} {row['Description']} {row['Test Type']}")
+        points.append(models.PointStruct(id=i, vector=vector, payload=payload))
+    return points
+
+
+def percentiles(samples: list) -> dict:
+    ms = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "samples": len(samples)
+    }
+
+
+def recall_at_k(ranked_urls: list, relevant: set, k: int = 10) -> float:
+    return len(relevant.intersection(ranked_urls[:k])) / len(relevant) if relevant else 0.0
+
+
+def average_precision_at_k(ranked_urls: list, relevant: set, k: int = 10) -> float:
+    hits, total = 0, 0.0
+    for rank, url in enumerate(ranked_urls[:k], start=1):
+        if url in relevant:
+            hits += 1
+            total += hits / rank
+    return total / min(len(relevant), k) if relevant else 0.0
+
+
+def timed(fn, iterations: int) -> tuple:
+    samples, result = [], None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def run(iterations: int) -> dict:
+    # Deterministic stand-ins for every external provider
+    genai.embed_content = fake_embed_content
+    genai.embed_content_async = fake_embed_content_async
+    generation_api.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions()))
+    generation_api.rerank_cache.max_size = 0
+    retrieval.embedding_cache = EmbeddingCache(max_size=0)
+
+    points = load_points()
+    qdrant = QdrantClient(location=":memory:")
+    qdrant.create_collection(
+        collection_name="rag_embeddings",
+        vectors_config=models.VectorParams(size=EMBEDDING_DIM, distance=models.Distance.COSINE)
+    )
+    qdrant.upsert(collection_name="rag_embeddings", points=points)
+    retrieval.qdrant_client = qdrant
+    retrieval.vector_index = VectorIndex.from_points(points)
+
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        labeled = json.load(f)
+
+    stages = {name: [] for name in (
+        "retrieve_qdrant_memory", "retrieve_numpy", "llm_rerank_stub",
+        "local_rerank", "parse_duration", "serialize_response"
+    )}
+    rankings = {name: [] for name in ("qdrant_vector", "numpy_vector", "llm_rerank_stub", "local_rerank")}
+    durations = [p.payload["duration"] for p in points] + ["Approximate Completion Time in minutes = 30", "", "-"]
+    loop = asyncio.new_event_loop()
+
+    for item in labeled:
+        query = item["query"]
+
+        retrieval.RETRIEVAL_BACKEND = "qdrant"
+        qdrant_candidates, samples = timed(lambda: retrieval.retrieve_from_qdrant(query, top_k=20), iterations)
+        stages["retrieve_qdrant_memory"] += samples
+
+        retrieval.RETRIEVAL_BACKEND = "numpy"
+        candidates, samples = timed(lambda: retrieval.retrieve_from_qdrant(query, top_k=20), iterations)
+        stages["retrieve_numpy"] += samples
+
+        (llm_ranked, _), samples = timed(
+            lambda: loop.run_until_complete(generation_api.llm_rerank(query, candidates)), iterations
+        )
+        stages["llm_rerank_stub"] += samples
+
+        local_ranked, samples = timed(lambda: local_rerank(query, candidates), iterations)
+        stages["local_rerank"] += samples
+
+        _, samples = timed(lambda: [parse_duration(d) for d in durations], iterations)
+        stages["parse_duration"] += samples
+
+        _, samples = timed(
+            lambda: generation_api.CompactJSONResponse(
+                generation_api.recommendation_content(llm_ranked, "llm")
+            ).body,
+            iterations
+        )
+        stages["serialize_response"] += samples
+
+        rankings["qdrant_vector"].append([c["url"] for c in qdrant_candidates])
+        rankings["numpy_vector"].append([c["url"] for c in candidates])
+        rankings["llm_rerank_stub"].append([c["url"] for c in llm_ranked])
+        rankings["local_rerank"].append([c["url"] for c in local_ranked])
+
+    loop.close()
+
+    quality = {}
+    for name, ranked_lists in rankings.items():
+        relevant_sets = [set(item["relevant_urls"]) for item in labeled]
+        quality[name] = {
+            "recall@10": round(float(np.mean([recall_at_k(r, rel) for r, rel in zip(ranked_lists, relevant_sets)])), 4),
+            "map@10": round(float(np.mean([average_precision_at_k(r, rel) for r, rel in zip(ranked_lists, relevant_sets)])), 4)
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "iterations": iterations,
+        "queries": len(labeled),
+        "catalog_size": len(points),
+        "stages": {name: percentiles(samples) for name, samples in stages.items()},
+        "quality": quality
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per query and stage")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    # Silence per-call logging from the pipeline while timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(args.iterations)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in results["stages"].items():
+        print(f"{name:24s} p50={stats['p50_ms']:.3f}ms p90={stats['p90_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms")
+    for name, metrics in results["quality"].items():
+        print(f"{name:24s} recall@10={metrics['recall@10']:.3f} MAP@10={metrics['map@10']:.3f}")
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Recall, latency and memory of the rag_embeddings collection profiles.
+
+Builds one collection per profile in app/collection_profiles.py, runs the
+labeled queries from tests/data/labeled_queries.json against it, and scores
+the top-k against exact (brute-force) search over the same vectors. Vectors
+come from the same deterministic hashing stand-in as tests/benchmark.py;
+--synthetic adds perturbed copies of the catalog to model a larger one.
+
+By default this uses local embedded Qdrant, which searches exhaustively:
+it checks that every profile builds and answers, but HNSW and quantization
+only change recall and latency on a real server (--url http://localhost:6333).
+RAM figures are estimates from the profile settings.
+
+    python tests/benchmark_collections.py --k 10 --synthetic 20000 --output collection_results.json
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark import QUERIES_PATH, fake_embedding, load_points, percentiles
+
+from qdrant_client import QdrantClient, models
+
+from collection_profiles import (
+    COLLECTION_PROFILES, collection_config, search_params, estimate_ram_bytes
+)
+from vector_index import VectorIndex, EMBEDDING_DIM
+
+
+def synthetic_points(points: list, count: int, noise: float = 0.3, seed: int = 0) -> list:
+    """Perturbed copies of catalog points, so the set keeps a realistic cluster structure"""
+    rng = np.random.default_rng(seed)
+    base = np.array([p.vector for p in points], dtype=np.float32)
+    extra = []
+    for i in range(count):
+        source = points[i % len(points)]
+        vector = base[i % len(points)] + rng.normal(0, noise * base.std(), EMBEDDING_DIM).astype(np.float32)
+        payload = {**source.payload, "url": f"{source.payload['url']}#synthetic-{i}"}
+        extra.append(models.PointStruct(id=len(points) + i, vector=vector.tolist(), payload=payload))
+    return extra
+
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 600):
+    # A server optimizes in the background; measuring before it turns green benchmarks the build
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(collection_name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"{collection_name} was not indexed within {timeout}s")
+
+
+def run_profile(client: QdrantClient, profile: str, points: list, queries: np.ndarray,
+                exact_ids: list, k: int, iterations: int) -> dict:
+    collection_name = f"bench_{profile}"
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+
+    start = time.perf_counter()
+    client.create_collection(collection_name=collection_name, **collection_config(profile, EMBEDDING_DIM))
+    client.upload_points(collection_name=collection_name, points=points, batch_size=256)
+    wait_until_indexed(client, collection_name)
+    build_seconds = time.perf_counter() - start
+
+    params = search_params(profile)
+    samples, recalls = [], []
+    for query, exact in zip(queries, exact_ids):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            hits = client.search(
+                collection_name=collection_name,
+                query_vector=query.tolist(),
+                search_params=params,
+                limit=k
+            )
+            samples.append(time.perf_counter() - start)
+        recalls.append(len(exact.intersection(str(hit.id) for hit in hits)) / k)
+
+    client.delete_collection(collection_name)
+    return {
+        "settings": COLLECTION_PROFILES[profile],
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "min_recall": round(float(np.min(recalls)), 4),
+        "latency": percentiles(samples),
+        "build_seconds": round(build_seconds, 3)
+    }
+
+
+def run(profiles: list, k: int, iterations: int, synthetic: int, url: str | None) -> dict:
+    points = load_points()
+    points += synthetic_points(points, synthetic)
+
+    with open(QUERIES_PATH, encoding="utf-8") as f:
+        labeled = json.load(f)
+    queries = np.array([fake_embedding(item["query"]) for item in labeled], dtype=np.float32)
+
+    # Ground truth: exhaustive cosine search over the same vectors
+    exact = VectorIndex.from_points(points).search_batch(queries, top_k=k)
+    exact_ids = [{hit.id for hit in hits} for hits in exact]
+    payload_bytes = sum(len(json.dumps(p.payload).encode("utf-8")) for p in points)
+
+    storage = None if url else tempfile.mkdtemp(prefix="qdrant-bench-")
+    client = QdrantClient(url=url) if url else QdrantClient(path=storage)
+
+    results = {}
+    try:
+        for profile in profiles:
+            results[profile] = run_profile(client, profile, points, queries, exact_ids, k, iterations)
+            results[profile]["estimated_ram_bytes"] = estimate_ram_bytes(
+                profile, len(points), EMBEDDING_DIM, payload_bytes
+            )
+    finally:
+        client.close()
+        if storage:
+            shutil.rmtree(storage, ignore_errors=True)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "mode": "server" if url else "embedded",
+        "points": len(points),
+        "queries": len(labeled),
+        "k": k,
+        "iterations": iterations,
+        "profiles": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(COLLECTION_PROFILES), choices=list(COLLECTION_PROFILES))
+    parser.add_argument("--k", type=int, default=10, help="Compare the top k results")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed searches per query")
+    parser.add_argument("--synthetic", type=int, default=0, help="Extra perturbed points to add to the catalog")
+    parser.add_argument("--url", default=None, help="Qdrant server to benchmark instead of embedded mode")
+    parser.add_argument("--output", default="collection_results.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    results = run(args.profiles, args.k, args.iterations, args.synthetic, args.url)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{results['points']} points, {results['queries']} queries, {results['mode']} mode")
+    for name, stats in results["profiles"].items():
+        print(
+            f"{name:14s} recall@{args.k}={stats[f'recall@{args.k}']:.3f} "
+            f"p50={stats['latency']['p50_ms']:.3f}ms p99={stats['latency']['p99_ms']:.3f}ms "
+            f"ram~{stats['estimated_ram_bytes']['total'] / 2**20:.1f}MiB build={stats['build_seconds']:.1f}s"
+        )
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Crawler behaviour against a local HTTP fixture server (no network needed).
+
+    python -m pytest tests/test_crawler.py    or    python tests/test_crawler.py
+"""
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.join(ROOT, "app", "prepocessing"))
+
+from crawler import Crawler
+from crawl_pages import snapshot_products, write_product_details
+from snapshots import SnapshotStore
+
+PRODUCT_PAGE = b"""<html><body>
+<div class="product-catalogue-training-calendar__row"><h4>Description</h4><p>Java 8 skills test</p></div>
+<div class="product-catalogue-training-calendar__row"><h4>Assessment length</h4><p>Approximate Completion Time in minutes = 30</p></div>
+</body></html>"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Requests seen by the server: (path, monotonic time, If-None-Match)
+    log = []
+    flaky_attempts = {}
+
+    def do_GET(self):
+        FixtureHandler.log.append((self.path, time.monotonic(), self.headers.get("If-None-Match")))
+
+        if self.path.startswith("/flaky"):
+            attempts = FixtureHandler.flaky_attempts[self.path] = FixtureHandler.flaky_attempts.get(self.path, 0) + 1
+            if attempts == 1:
+                return self._send(429, b"slow down", {"Retry-After": "1"})
+            return self._send(200, PRODUCT_PAGE)
+
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304, b"", {"ETag": '"v1"'})
+            return self._send(200, PRODUCT_PAGE, {"ETag": '"v1"'})
+
+        if self.path.startswith("/page"):
+            return self._send(200, PRODUCT_PAGE)
+
+        self._send(404, b"not found")
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CrawlerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureHandler.log.clear()
+        FixtureHandler.flaky_attempts.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def requests_to(self, prefix: str) -> list:
+        return [entry for entry in FixtureHandler.log if entry[0].startswith(prefix)]
+
+    def test_retry_honours_retry_after(self):
+        crawler = Crawler(rate_per_host=0, retries=2, backoff=0.01)
+        result = crawler.fetch(f"{self.base}/flaky")
+        crawler.close()
+
+        self.assertEqual(result.status, 200)
+        self.assertEqual(crawler.stats["retries"], 1)
+        first, second = self.requests_to("/flaky")
+        # The 1s Retry-After wins over the 10ms backoff
+        self.assertGreaterEqual(second[1] - first[1], 0.9)
+
+    def test_not_modified_reuses_cached_body(self):
+        crawler = Crawler(rate_per_host=0, cache_dir=os.path.join(self.tmp.name, "cache"))
+        first = crawler.fetch(f"{self.base}/etag")
+        second = crawler.fetch(f"{self.base}/etag")
+        crawler.close()
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, PRODUCT_PAGE)
+        self.assertEqual([entry[2] for entry in self.requests_to("/etag")], [None, '"v1"'])
+        self.assertEqual(crawler.stats["not_modified"], 1)
+
+    def test_rate_limit_spaces_requests_per_host(self):
+        crawler = Crawler(concurrency=6, rate_per_host=5)
+        results = crawler.fetch_all([f"{self.base}/page?{i}" for i in range(6)])
+        crawler.close()
+
+        self.assertTrue(all(result.status == 200 for result in results))
+        starts = sorted(entry[1] for entry in self.requests_to("/page"))
+        # Six requests at 5/s: the last starts about a second after the first
+        self.assertGreaterEqual(starts[-1] - starts[0], 0.9)
+
+    def test_failed_pages_are_recorded_as_error_rows(self):
+        urls = [f"{self.base}/page/java", f"{self.base}/missing"]
+        store = SnapshotStore(os.path.join(self.tmp.name, "snapshots"))
+        crawler = Crawler(rate_per_host=0, retries=0)
+        snapshot_products(crawler, urls, store)
+        crawler.close()
+
+        self.assertEqual(crawler.stats["errors"], 1)
+        self.assertIsNone(store.latest(urls[1]))
+
+        products = pd.DataFrame({"name": ["Java 8", "Gone"], "url": urls, "irt": ["No", "No"]})
+        output = os.path.join(self.tmp.name, "details.csv")
+        write_product_details(store, products, output, workers=1)
+
+        with open(output, newline="", encoding="utf-8") as f:
+            rows = {row["URL"]: row for row in csv.DictReader(f)}
+        self.assertEqual(rows[urls[0]]["Description"], "Java 8 skills test")
+        self.assertEqual(rows[urls[1]]["Description"], "Error")
+        self.assertEqual(rows[urls[1]]["Test Type"], "Error")
+
+
+if __name__ == "__main__":
+    unittest.main()